@@ -0,0 +1,27 @@
+from . import (
+    startup,
+    parse,
+    nodes,
+    memory,
+    dispatch,
+    types,
+    analysis,
+    compile,
+    bytecode,
+    lists,
+    superinstructions,
+    loops,
+)
+
+startup.main()
+parse.main()
+nodes.main()
+memory.main()
+dispatch.main()
+types.main()
+analysis.main()
+compile.main()
+bytecode.main()
+lists.main()
+superinstructions.main()
+loops.main()
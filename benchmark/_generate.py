@@ -0,0 +1,47 @@
+from colc.common import StringBuilder
+
+
+def synthetic_program(functions: int, mappings: int = 1, calls: int = 1) -> str:
+    """
+    Generates a valid program with the given number of functions, the functions are called evenly distributed over the
+    given number of mappings. Every function is called the given number of times.
+    """
+    builder = StringBuilder()
+
+    builder.write_line('con main { all:')
+    builder.write_line('  size >= 1;')
+    builder.write_line('}')
+
+    for i in range(functions):
+        builder.write_line(f'fun f{i}(node, n) {{')
+        builder.write_line(f'  var a = node.attr{i % 7} + n * {i % 13} - (n // 2);')
+        builder.write_line(f'  final b = [1, 2, a, "s{i}"];')
+        builder.write_line('  for item in children(node) {')
+        builder.write_line(f'    if kind(item) == CORE && a > {i % 5} {{')
+        builder.write_line('      a = a + len(b);')
+        builder.write_line('    } else {')
+        builder.write_line(f'      exec("cmd{i}" .. str(a), item, [node]);')
+        builder.write_line('    }')
+        builder.write_line('  }')
+        builder.write_line('  return a;')
+        builder.write_line('}')
+
+    for m in range(mappings):
+        builder.write_line(f'map m{m} {{')
+        for i in range(m, functions, mappings):
+            for c in range(calls):
+                builder.write_line(f'  final r{i}_{c} = f{i}(root, {i});')
+        builder.write_line('}')
+
+    return builder.build()
+
+
+def nested_expression_program(depth: int) -> str:
+    """
+    Generates a mapping with one expression of the given depth, the innermost operand is only known at runtime.
+    """
+    expression = 'root.attr'
+    for i in range(depth):
+        expression = f'({expression} + {i % 7})'
+
+    return f'map main {{\n  final a = {expression};\n}}\n'
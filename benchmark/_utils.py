@@ -0,0 +1,26 @@
+import statistics
+import time
+from typing import Callable
+
+
+def measure(func: Callable[[], object], repeat: int = 5) -> float:
+    """
+    Returns the median wall time of func in seconds.
+    """
+    samples = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+
+    return statistics.median(samples)
+
+
+def report(name: str, baseline: float, candidate: float, unit: str = 'ms'):
+    scale = {'s': 1, 'ms': 1e3, 'us': 1e6}[unit]
+
+    print(
+        '%-40s %10.2f%s -> %10.2f%s  (x%.2f)'
+        % (name, baseline * scale, unit, candidate * scale, unit, baseline / candidate)
+    )
@@ -0,0 +1,26 @@
+import pathlib
+
+from colc import TextFile, parse_file
+from colc.backend import Context, Config, process_mappings
+
+from ._generate import nested_expression_program
+from ._utils import measure
+
+_depths = [25, 50, 100, 200]
+
+
+def _compile_time(depth: int) -> float:
+    file = parse_file(TextFile(pathlib.Path('bench.col'), nested_expression_program(depth)))
+    return measure(lambda: process_mappings(Context(Config(), file)))
+
+
+def main():
+    print('analysis: mapping compile time of nested expressions')
+
+    for depth in _depths:
+        time = _compile_time(depth)
+        print('%-40s %10.2fms  %10.2fus/node' % (f'depth {depth}', time * 1e3, time * 1e6 / depth))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import pathlib
+
+from colc import TextFile, parse_file
+from colc.backend import Context, Config, InstructionBuffer, process_mappings
+from colc.backend._process_mapping import VisitorImpl
+
+from ._generate import synthetic_program
+from ._utils import measure, report
+
+_iterations = 200
+
+
+def _build_narrow(buffer: InstructionBuffer) -> bytes:
+    """
+    Former encoding without EXT prefixes, only valid if every argument fits into one byte.
+    """
+    builder = bytearray()
+
+    for i, instr in enumerate(buffer.instructions):
+        builder.append(instr.opcode)
+
+        if not instr.opcode.is_jmp:
+            builder.append(instr.argument_value)
+        else:
+            builder.append(abs(i - buffer.labels[instr.argument_label]))
+
+    return bytes(builder)
+
+
+def _buffers(text: str) -> list[InstructionBuffer]:
+    ctx = Context(Config(), parse_file(TextFile(pathlib.Path('bench.col'), text)))
+    buffers = []
+
+    for mapping in ctx.file.mappings:
+        visitor = VisitorImpl(ctx)
+        visitor.accept(mapping.block)
+        visitor.finalize()
+
+        buffers.append(visitor.buffer)
+
+    return buffers
+
+
+def _build_all(buffers: list[InstructionBuffer], build) -> int:
+    size = 0
+
+    for _ in range(_iterations):
+        size = sum(len(build(it)) for it in buffers)
+
+    return size
+
+
+def main():
+    print('bytecode: encoding of small mappings')
+
+    buffers = _buffers(synthetic_program(100, mappings=25))
+
+    narrow = _build_all(buffers, _build_narrow)
+    extended = _build_all(buffers, InstructionBuffer.build)
+    print('%-40s %10dB -> %10dB' % ('code size (narrow -> extended)', narrow, extended))
+
+    report(
+        'build (narrow -> extended)',
+        measure(lambda: _build_all(buffers, _build_narrow)),
+        measure(lambda: _build_all(buffers, InstructionBuffer.build)),
+    )
+
+    # exceeds one byte arguments in const pool indices, slots and jumps
+    file = parse_file(TextFile(pathlib.Path('bench.col'), synthetic_program(200)))
+    size = sum(len(it.code) for it in process_mappings(Context(Config(), file)))
+    print('%-40s %10dB' % ('code size of one large mapping', size))
+
+
+if __name__ == '__main__':
+    main()
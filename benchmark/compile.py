@@ -0,0 +1,32 @@
+import pathlib
+import sys
+
+from colc import TextFile, parse_file
+from colc.backend import Context, Config, File, process_mappings
+
+from ._generate import synthetic_program
+from ._utils import measure
+
+
+def main():
+    file = parse_file(TextFile(pathlib.Path('bench.col'), synthetic_program(100, mappings=25)))
+    print('compile: mappings of a synthetic program, mostly runtime expressions')
+
+    time = measure(lambda: process_mappings(Context(Config(), file)), repeat=20)
+    print('%-40s %10.2fms' % ('process mappings', time * 1e3))
+
+    file = parse_file(TextFile(pathlib.Path('bench.col'), synthetic_program(20, calls=10)))
+    inlined = _code_size(file, Config(inline_cost=sys.maxsize))
+    outlined = _code_size(file, Config())
+    print('%-40s %9dB -> %9dB' % ('code size (inlined -> subroutines)', inlined, outlined))
+
+
+def _code_size(file: File, config: Config) -> int:
+    ctx = Context(config, file)
+    mappings = process_mappings(ctx)
+
+    return sum(len(it.code) for it in mappings) + sum(len(it.code) for it in ctx.get_subroutines())
+
+
+if __name__ == '__main__':
+    main()
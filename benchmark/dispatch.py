@@ -0,0 +1,34 @@
+from colc.backend import _functions
+from colc.common import RuntimeValue, types
+from colc.frontend import Operator
+
+from ._utils import measure, report
+
+_iterations = 20000
+
+_operands = [
+    (Operator.ADD, RuntimeValue(types.NUMBER), RuntimeValue(types.NUMBER)),
+    (Operator.EQL, RuntimeValue(types.STRING), RuntimeValue(types.STRING)),
+    (Operator.AND, RuntimeValue(types.BOOLEAN), RuntimeValue(types.BOOLEAN)),
+    (Operator.CONCAT, RuntimeValue(types.STRING), RuntimeValue(types.STRING)),
+    (Operator.PREPEND, RuntimeValue(types.NUMBER), RuntimeValue(types.LIST_INTEGER)),
+]
+
+
+def _infer(memoized: bool):
+    for _ in range(_iterations):
+        for op, left, right in _operands:
+            if not memoized:
+                _functions._operators.clear()
+
+            _functions.operator_binary_infer(op, left, right)
+
+
+def main():
+    print('dispatch: binary operator type inference')
+
+    report('resolve -> memoized', measure(lambda: _infer(False)), measure(lambda: _infer(True)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import pathlib
+
+from colc import TextFile, parse_file
+from colc.backend import Context, Config, Opcode, process_mappings
+
+from ._utils import measure, report
+
+_elements = 500
+_iterations = 20
+
+
+def _table_program(elements: int) -> str:
+    values = ', '.join(str(i * 3) if i % 2 == 0 else f'"e{i}"' for i in range(elements))
+    return f'map main {{\n  final table = [{values}];\n}}\n'
+
+
+def _compile(text: str, config: Config) -> tuple[bytes, list]:
+    ctx = Context(config, parse_file(TextFile(pathlib.Path('bench.col'), text)))
+    mappings = process_mappings(ctx)
+
+    return mappings[0].code, ctx.get_const_pool()
+
+
+def _execute(code: bytes, const_pool: list) -> object:
+    """
+    Runs the code on a minimal stack machine that only knows the instructions of list constants, lists are immutable
+    tuples like in the runtime.
+    """
+    stack: list = []
+    slots: dict[int, object] = {}
+    argument = 0
+
+    for i in range(0, len(code), 2):
+        opcode, argument = code[i], argument << 8 | code[i + 1]
+
+        if opcode == Opcode.EXT:
+            continue
+
+        if opcode == Opcode.LIST:
+            stack.append(())
+        elif opcode == Opcode.LIST_CONST or opcode == Opcode.CONST:
+            stack.append(const_pool[argument])
+        elif opcode == Opcode.INT:
+            stack.append(argument)
+        elif opcode == Opcode.PREPEND:
+            # constant lists push the element after the list
+            element = stack.pop()
+            stack.append((element, *stack.pop()))
+        elif opcode == Opcode.STORE:
+            slots[argument] = stack.pop()
+
+        argument = 0
+
+    return slots
+
+
+def main():
+    print(f'lists: constant table with {_elements} elements')
+
+    text = _table_program(_elements)
+    built = _compile(text, Config(['no-const-list']))
+    pooled = _compile(text, Config())
+
+    print('%-40s %9dB -> %9dB' % ('code size (prepend -> const)', len(built[0]), len(pooled[0])))
+
+    def execute(code: bytes, const_pool: list):
+        for _ in range(_iterations):
+            _execute(code, const_pool)
+
+    report('load (prepend -> const)', measure(lambda: execute(*built)), measure(lambda: execute(*pooled)), unit='us')
+
+
+if __name__ == '__main__':
+    main()
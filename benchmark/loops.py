@@ -0,0 +1,55 @@
+import pathlib
+
+from colc import TextFile, parse_file, debug
+from colc.backend import Context, Config, Opcode, process_mappings
+
+_program = """
+map main {
+  final names = [root.name, "b"];
+  var result = "";
+
+  for child in children(root) {
+    final suffix = root.name .. "_suffix";
+    result = result .. suffix .. str(len(names)) .. str(root.size * 2 + len(names));
+
+    if kind(child) == CORE {
+      result = result .. str(kind(root)) .. suffix;
+    }
+  }
+
+  final r = result;
+}
+"""
+
+
+def _compile(config: Config) -> bytes:
+    ctx = Context(config, parse_file(TextFile(pathlib.Path('bench.col'), _program)))
+    return process_mappings(ctx)[0].code
+
+
+def _loop_instructions(code: bytes) -> int:
+    """
+    Number of instructions between the start of every loop and its backward jump, executed on every iteration.
+    """
+    instructions = debug.decode_code(code)
+    indices = [index for index, _, _ in instructions]
+
+    count = 0
+    for position, (index, opcode, argument) in enumerate(instructions):
+        if opcode == Opcode.JMP_B:
+            count += position - indices.index(index - argument) + 1
+
+    return count
+
+
+def main():
+    print('loops: instructions per iteration of a for loop')
+
+    plain = _loop_instructions(_compile(Config(['no-loop-invariant'])))
+    hoisted = _loop_instructions(_compile(Config()))
+
+    print('%-40s %10d -> %10d' % ('instructions (plain -> hoisted)', plain, hoisted))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import gc
+import pathlib
+import tracemalloc
+
+from colc import TextFile
+from colc.frontend import parse, ast
+
+from ._generate import synthetic_program
+
+
+def _count_nodes(value) -> int:
+    if isinstance(value, list):
+        return sum(_count_nodes(it) for it in value)
+    if not isinstance(value, ast.Node):
+        return 0
+
+    return 1 + sum(_count_nodes(getattr(value, it)) for it in value.fields)
+
+
+def main():
+    file = TextFile(pathlib.Path('bench.col'), synthetic_program(500))
+    print('memory: resident size of a parsed %.1f MB synthetic program' % (len(file.text) / 1e6))
+
+    # construct the parser outside the measurement
+    parse(file)
+    gc.collect()
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        nodes = parse(file)
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    count = _count_nodes(nodes)
+    print('%-40s %10.1fMB' % ('ast size', size / 1e6))
+    print('%-40s %10d' % ('ast nodes', count))
+    print('%-40s %10.1fB' % ('bytes per node', size / count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import pathlib
+import time
+
+from colc import TextFile
+from colc.common import ComptimeValue, Location
+from colc.frontend import ast, Operator, Qualifier
+
+_iterations = 20000
+
+
+def _build(location: Location) -> int:
+    """
+    Builds a small expression tree and returns the number of created nodes.
+    """
+    identifier = ast.Identifier(location=location, name='a')
+    ref = ast.ExpressionRef(location=location, identifier=identifier)
+    literal = ast.ExpressionLiteral(location=location, value=ComptimeValue.from_python(1))
+    binary = ast.ExpressionBinary(location=location, operator=Operator.ADD, left=ref, right=literal)
+    ast.FStatementDefine(location=location, qualifier=Qualifier.FINAL, identifier=identifier, expression=binary)
+
+    return 5
+
+
+def _nodes_per_second() -> float:
+    location = Location(TextFile(pathlib.Path('bench.col'), ''), 0, 0)
+
+    count = 0
+    start = time.perf_counter()
+
+    for _ in range(_iterations):
+        count += _build(location)
+
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    print('nodes: ast node construction')
+
+    # type checks correspond to the former default behaviour
+    ast.enable_type_checks(True)
+    checked = _nodes_per_second()
+
+    ast.enable_type_checks(False)
+    unchecked = _nodes_per_second()
+
+    print(
+        '%-40s %10.0f nodes/s -> %10.0f nodes/s  (x%.2f)'
+        % ('type checked -> default', checked, unchecked, unchecked / checked)
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+import pathlib
+import tracemalloc
+
+from colc import TextFile
+from colc.frontend import parse
+
+from ._generate import synthetic_program
+from ._utils import measure, report
+
+
+def _peak_memory(file: TextFile, single_pass: bool) -> int:
+    tracemalloc.start()
+    try:
+        parse(file, single_pass=single_pass)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    file = TextFile(pathlib.Path('bench.col'), synthetic_program(500))
+    print('parse: %.1f MB synthetic program' % (len(file.text) / 1e6))
+
+    # construct the parsers outside the measurement
+    parse(file, single_pass=True)
+    parse(file, single_pass=False)
+
+    two_pass = measure(lambda: parse(file, single_pass=False), repeat=3)
+    single_pass = measure(lambda: parse(file, single_pass=True), repeat=3)
+    report('parse time (two pass -> single pass)', two_pass, single_pass, unit='s')
+
+    two_pass = _peak_memory(file, single_pass=False)
+    single_pass = _peak_memory(file, single_pass=True)
+    print('%-40s %10.1fMB -> %10.1fMB' % ('peak memory', two_pass / 1e6, single_pass / 1e6))
+
+
+if __name__ == '__main__':
+    main()
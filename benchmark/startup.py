@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+from ._utils import measure, report
+
+# parses a minimal file, such that the time is dominated by parser construction
+_script = """
+import pathlib
+from colc import TextFile
+from colc.frontend import parse
+
+parse(TextFile(pathlib.Path('bench.col'), 'map main {}'))
+"""
+
+
+def _run(cache_dir: str):
+    env = dict(os.environ, COLC_CACHE_DIR=cache_dir)
+    subprocess.run([sys.executable, '-c', _script], env=env, check=True)
+
+
+def main():
+    print('startup: parse a minimal file in a fresh process')
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # prime the cache
+        _run(cache_dir)
+
+        cold = measure(lambda: _run(''), repeat=10)
+        warm = measure(lambda: _run(cache_dir), repeat=10)
+
+    report('process startup (no cache -> cache)', cold, warm)
+
+
+if __name__ == '__main__':
+    main()
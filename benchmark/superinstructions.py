@@ -0,0 +1,32 @@
+import pathlib
+
+from colc import TextFile, parse_file, debug
+from colc.backend import Context, Config, process_mappings
+
+from ._generate import synthetic_program
+
+
+def _compile(text: str, config: Config) -> list[bytes]:
+    ctx = Context(config, parse_file(TextFile(pathlib.Path('bench.col'), text)))
+    mappings = process_mappings(ctx)
+
+    return [it.code for it in mappings] + [it.code for it in ctx.get_subroutines()]
+
+
+def _instructions(codes: list[bytes]) -> int:
+    return sum(len(debug.decode_code(it)) for it in codes)
+
+
+def main():
+    print('superinstructions: opcode pairs of a synthetic program')
+
+    text = synthetic_program(100, mappings=25)
+    plain = _compile(text, Config(['no-superinstruction']))
+    fused = _compile(text, Config())
+
+    print(debug.format_histogram(debug.opcode_histogram(plain, n=2), limit=10))
+    print('%-40s %10d -> %10d' % ('instructions (plain -> fused)', _instructions(plain), _instructions(fused)))
+
+
+if __name__ == '__main__':
+    main()
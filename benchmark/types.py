@@ -0,0 +1,59 @@
+from colc.common import types
+from colc.common.values._type import PrimitiveType
+
+from ._utils import measure, report
+
+_iterations = 20000
+
+_types = [types.NUMBER, types.STRING, types.NODE, types.LIST_NODE, types.ANY, types.BOOLEAN]
+
+
+class _SetType:
+    """
+    Set based type, mirrors the former representation of types.
+    """
+
+    __slots__ = ('values', 'is_list')
+
+    def __init__(self, values: set[PrimitiveType], list: bool = False):
+        self.values = values
+        self.is_list = list
+
+    @staticmethod
+    def lup(types) -> '_SetType':
+        return _SetType({value for it in types for value in it.values}, list=any(it.is_list for it in types))
+
+    @property
+    def as_scalar(self) -> '_SetType':
+        return _SetType(self.values, list=False)
+
+    def compatible(self, other: '_SetType') -> bool:
+        if self.is_list != other.is_list:
+            return False
+
+        return len(self.values & other.values) > 0
+
+    def __eq__(self, other) -> bool:
+        return self.is_list == other.is_list and self.values == other.values
+
+
+def _operations(candidates: list):
+    for _ in range(_iterations):
+        for left in candidates:
+            for right in candidates:
+                left.compatible(right)
+                left == right
+
+            type(left).lup(candidates).as_scalar
+
+
+def main():
+    print('types: compatible, equality and least upper bound')
+
+    baseline = [_SetType(set(it.values), list=it.is_list) for it in _types]
+
+    report('set -> interned mask', measure(lambda: _operations(baseline)), measure(lambda: _operations(_types)))
+
+
+if __name__ == '__main__':
+    main()
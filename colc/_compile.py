@@ -1,3 +1,5 @@
+import dataclasses
+import hashlib
 import pathlib
 from typing import Optional
 
@@ -28,17 +30,87 @@ def _find_include(include: ast.Include) -> pathlib.Path:
     fatal_problem('could not locate include', include.path)
 
 
-def _parse_include(include: ast.Include) -> File:
-    return parse_file(read_file(_find_include(include)))
+@dataclasses.dataclass
+class _ParsedFile:
+    source: TextFile
+    mtime: int
+    digest: str
+    includes: list[ast.Include]
+    definitions: list[ast.Definition]
 
 
-def parse_file(file: TextFile) -> File:
+def _parse_nodes(file: TextFile) -> tuple[list[ast.Include], list[ast.Definition]]:
     result = parse(file)
 
-    includes = [_parse_include(it) for it in result if isinstance(it, ast.Include)]
+    includes = [it for it in result if isinstance(it, ast.Include)]
     definitions = [it for it in result if isinstance(it, ast.Definition)]
 
-    return File(file, includes, definitions)
+    return includes, definitions
+
+
+# process wide cache of parsed includes, keyed by their canonical path
+_cache: dict[pathlib.Path, _ParsedFile] = {}
+
+
+def _parse_cached(path: pathlib.Path) -> _ParsedFile:
+    source = read_file(path)
+
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        fatal_problem(f'could not read file {path}')
+
+    digest = hashlib.sha256(source.text.encode()).hexdigest()
+
+    parsed = _cache.get(path)
+    if parsed is None or parsed.mtime != mtime or parsed.digest != digest:
+        parsed = _ParsedFile(source, mtime, digest, *_parse_nodes(source))
+        _cache[path] = parsed
+
+    return parsed
+
+
+def clear_include_cache():
+    _cache.clear()
+
+
+class _IncludeLoader:
+    """
+    Links the include graph of one compilation. Every include is parsed at most once and cyclic includes are rejected.
+    """
+
+    def __init__(self):
+        self._files: dict[pathlib.Path, File] = {}
+        self._active: set[pathlib.Path] = set()
+
+    def link(self, source: TextFile, includes: list[ast.Include], definitions: list[ast.Definition]) -> File:
+        # the file itself could be included by one of its includes
+        path = source.path.resolve()
+        self._active.add(path)
+
+        file = File(source, [self.include(it) for it in includes], definitions)
+
+        self._active.discard(path)
+        return file
+
+    def include(self, include: ast.Include) -> File:
+        path = _find_include(include).resolve()
+
+        if path in self._active:
+            fatal_problem('cyclic include', include.path)
+
+        file = self._files.get(path)
+        if file is None:
+            parsed = _parse_cached(path)
+
+            file = self.link(parsed.source, parsed.includes, parsed.definitions)
+            self._files[path] = file
+
+        return file
+
+
+def parse_file(file: TextFile) -> File:
+    return _IncludeLoader().link(file, *_parse_nodes(file))
 
 
 def compile_file(file: TextFile, config: Optional[Config] = None) -> Object:
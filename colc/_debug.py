@@ -1,3 +1,6 @@
+import collections
+from typing import Iterable, Tuple
+
 from colc.common import StringBuilder
 from colc.backend import Opcode
 
@@ -13,16 +16,70 @@ def format_pool(values: list) -> str:
     return builder.build()
 
 
-def format_code(buffer: bytes) -> str:
+def format_statistics(statistics: dict[str, int]) -> str:
     builder = StringBuilder()
 
+    for name, count in sorted(statistics.items()):
+        builder.write_line('%-30s %6d' % (name, count))
+
+    return builder.build()
+
+
+def decode_code(buffer: bytes) -> list[Tuple[int, Opcode, int]]:
+    """
+    Splits the code into the index, opcode and argument of every instruction. EXT prefixes are folded into the following
+    instruction, which is listed at the index of its first prefix.
+    """
+    instructions: list[Tuple[int, Opcode, int]] = []
+
+    start = 0
+    argument = 0
+
     for i in range(0, len(buffer) // 2):
-        line = '%03d: %-8s %3d' % (
-            i,
-            Opcode(buffer[i * 2]).name,
-            buffer[i * 2 + 1],
-        )
-        builder.write_line(line)
+        opcode = Opcode(buffer[i * 2])
+        argument = argument << 8 | buffer[i * 2 + 1]
+
+        if opcode == Opcode.EXT:
+            continue
+
+        instructions.append((start, opcode, argument))
+
+        start = i + 1
+        argument = 0
+
+    return instructions
+
+
+def format_code(buffer: bytes) -> str:
+    builder = StringBuilder()
+
+    for index, opcode, argument in decode_code(buffer):
+        builder.write_line('%03d: %-10s %3d' % (index, opcode.name, argument))
+
+    return builder.build()
+
+
+def opcode_histogram(codes: Iterable[bytes], n: int = 2) -> collections.Counter[Tuple[Opcode, ...]]:
+    """
+    Counts every sequence of n consecutive opcodes in the codes. Candidates for superinstructions are the most common
+    sequences.
+    """
+    histogram: collections.Counter[Tuple[Opcode, ...]] = collections.Counter()
+
+    for code in codes:
+        opcodes = [opcode for _, opcode, _ in decode_code(code)]
+        histogram.update(zip(*(opcodes[i:] for i in range(n))))
+
+    return histogram
+
+
+def format_histogram(histogram: collections.Counter[Tuple[Opcode, ...]], limit: int = 20) -> str:
+    builder = StringBuilder()
+    total = histogram.total()
+
+    for sequence, count in histogram.most_common(limit):
+        name = ' '.join(it.name for it in sequence)
+        builder.write_line('%-30s %6d %5.1f%%' % (name, count, count / total * 100))
 
     return builder.build()
 
@@ -40,4 +97,16 @@ def print_debug_info(obj: Object):
     for mapping in obj.mappings:
         print('MAPPING: %s' % mapping.name)
         print(format_code(mapping.code))
+        print('SLOTS: %d' % mapping.slots)
+        print()
+
+    for i, subroutine in enumerate(obj.subroutines):
+        print('SUBROUTINE %03d: %s' % (i, subroutine.name))
+        print(format_code(subroutine.code))
+        print('SLOTS: %d' % subroutine.slots)
+        print()
+
+    if len(obj.statistics) > 0:
+        print('STATISTICS:')
+        print(format_statistics(obj.statistics))
         print()
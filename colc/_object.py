@@ -1,7 +1,9 @@
+import collections
+
 from .__about__ import __version__
 
-from colc.common import num
-from colc.backend import LExpression, Mapping, Context
+from colc.common import num, comptime_data
+from colc.backend import LExpression, Mapping, Subroutine, Context
 
 
 class Object:
@@ -10,14 +12,29 @@ class Object:
     # main constraint
     constraint: LExpression
 
-    # shared pool of constant definitions
-    const_pool: list[str | num]
+    # shared pool of constant definitions, constant lists are tuples
+    const_pool: list[str | num | tuple[comptime_data, ...]]
 
     # list of available mappings
     mappings: list[Mapping]
 
+    # functions called at runtime, indexed by the argument of CALL
+    subroutines: list[Subroutine]
+
+    # compiler statistics, not part of the encoded object
+    statistics: collections.Counter[str]
+
     def __init__(self, ctx: Context, constraint: LExpression, mappings: list[Mapping]):
         self.version = __version__
         self.constraint = constraint
         self.mappings = mappings
         self.const_pool = ctx.get_const_pool()
+        self.subroutines = ctx.get_subroutines()
+
+        self.statistics = ctx.statistics
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['statistics']
+
+        return state
@@ -16,6 +16,7 @@ from ._context import Context as Context
 from ._config import Config as Config
 
 from ._mapping import Mapping as Mapping
+from ._subroutine import Subroutine as Subroutine
 
 from ._fixpoint import fixpoint_to_float as fixpoint_to_float
 
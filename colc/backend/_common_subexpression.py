@@ -0,0 +1,118 @@
+import collections
+from typing import Tuple
+
+from ._instruction import Instruction, InstructionBuffer, Label, Item, successors
+from ._opcode import Opcode
+from ._utils import Allocator
+
+# an operation on a local slot: the slot, the opcode and its argument
+Expression = Tuple[int, Opcode, int]
+
+# operations without side effects whose result only depends on their operand
+_pure = frozenset({Opcode.ATTR, Opcode.KIND_OF, Opcode.LENGTH})
+
+# instructions that change the value of the local slot in their argument
+_slot_writes = frozenset({Opcode.STORE, Opcode.NEXT, Opcode.RESET})
+
+# instructions that can change nodes, the result of every operation has to be computed again
+_barriers = frozenset({Opcode.EXEC, Opcode.CALL})
+
+
+def eliminate_common_subexpressions(
+    buffer: InstructionBuffer, allocator: Allocator, statistics: collections.Counter[str]
+):
+    """
+    Replaces pure operations on a local, which were already computed on every path since the local was last changed,
+    by loading a temporary slot. The first computations store their result in the temporary slot. Counts the replaced
+    operations in statistics.
+    """
+    items = buffer.items()
+    expressions = _expressions(items)
+
+    available = _available(items, expressions)
+    redundant = {i for i, it in expressions.items() if it in available[i]}
+
+    if len(redundant) == 0:
+        return
+
+    # temporary slots are never reused, they are live across arbitrary code
+    temporaries: dict[Expression, int] = {}
+    for i in sorted(redundant):
+        if expressions[i] not in temporaries:
+            temporaries[expressions[i]] = allocator.alloc_unused()
+
+    result: list[Item] = []
+
+    for i, item in enumerate(items):
+        if i in redundant:
+            # replace the load of the operand
+            result[-1] = Instruction.new_load(temporaries[expressions[i]])
+            statistics['common subexpression'] += 1
+        elif i in expressions and expressions[i] in temporaries:
+            result.append(item)
+            result.append(Instruction.new_store(temporaries[expressions[i]]))
+            result.append(Instruction.new_load(temporaries[expressions[i]]))
+        else:
+            result.append(item)
+
+    buffer.replace(result)
+
+
+def _expressions(items: list[Item]) -> dict[int, Expression]:
+    """
+    Pure operations on a local by the index of the operation in items.
+    """
+    expressions: dict[int, Expression] = {}
+
+    for i in range(1, len(items)):
+        load, operation = items[i - 1], items[i]
+
+        if not isinstance(load, Instruction) or not isinstance(operation, Instruction):
+            continue
+
+        if load.opcode == Opcode.LOAD and operation.opcode in _pure:
+            expressions[i] = (load.argument_value, operation.opcode, operation.argument_value)
+
+    return expressions
+
+
+def _available(items: list[Item], expressions: dict[int, Expression]) -> list[frozenset[Expression]]:
+    """
+    Expressions that are computed on every path to an item, without an instruction that changes them in between.
+    """
+    labels = {it: i for i, it in enumerate(items) if isinstance(it, Label)}
+
+    predecessors: list[list[int]] = [[] for _ in items]
+    for i in range(len(items)):
+        for successor in successors(items, labels, i):
+            predecessors[successor].append(i)
+
+    universe = frozenset(expressions.values())
+
+    available_in = [frozenset[Expression]() for _ in items]
+    available_out = [universe for _ in items]
+
+    changed = True
+    while changed:
+        changed = False
+
+        for i, item in enumerate(items):
+            # nothing is available at the start
+            available = universe if i > 0 else frozenset[Expression]()
+            for predecessor in predecessors[i]:
+                available = available & available_out[predecessor]
+
+            available_in[i] = available
+
+            if isinstance(item, Instruction) and item.opcode in _barriers:
+                available = frozenset()
+            if isinstance(item, Instruction) and item.opcode in _slot_writes:
+                available = frozenset(it for it in available if it[0] != item.argument_value)
+            if i in expressions:
+                available = available | {expressions[i]}
+
+            if available != available_out[i]:
+                available_out[i] = available
+                changed = True
+
+    return available_in
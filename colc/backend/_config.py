@@ -6,6 +6,12 @@ from colc.common import fatal_problem
 
 class Optimization(enum.StrEnum):
     REDUNDANT_QUANTIFIER = 'redundant-quantifier'
+    PEEPHOLE = 'peephole'
+    DEAD_CODE = 'dead-code'
+    COMMON_SUBEXPRESSION = 'common-subexpression'
+    CONST_LIST = 'const-list'
+    SUPERINSTRUCTION = 'superinstruction'
+    LOOP_INVARIANT = 'loop-invariant'
 
 
 def _parse(flag: str) -> Tuple[str, bool]:
@@ -16,9 +22,28 @@ def _parse(flag: str) -> Tuple[str, bool]:
 
 
 class Config:
-    def __init__(self, optimizations: Optional[list[str]] = None):
+    def __init__(
+        self,
+        optimizations: Optional[list[str]] = None,
+        comptime_iterations: int = 1024,
+        comptime_fuel: int = 10000,
+        inline_depth: int = 32,
+        inline_cost: int = 32,
+    ):
         self._optimizations: set[str] = set(Optimization)
 
+        # maximum number of loop iterations for each expression evaluated at compile time
+        self.comptime_iterations = comptime_iterations
+
+        # maximum number of statements for each expression evaluated at compile time
+        self.comptime_fuel = comptime_fuel
+
+        # maximum nesting of inlined or compile time evaluated function calls
+        self.inline_depth = inline_depth
+
+        # maximum number of instructions of a function body that is inlined, larger functions are called
+        self.inline_cost = inline_cost
+
         for flag in filter(str.strip, optimizations or []):
             if flag == 'all':
                 self._optimizations = set(Optimization)
@@ -1,13 +1,19 @@
-from typing import Optional
+import collections
+from typing import Optional, Hashable
 
-from colc.common import internal_problem, ComptimeValue, num, comptime
+from colc.common import internal_problem, ComptimeValue, num, comptime, comptime_data
 
 from ._file import File
 from ._config import Config
 from ._utils import Pool
+from ._subroutine import Specialization, Subroutine
 
 
-def check_const_pool_value(value: comptime) -> num | str:
+# lists are pooled as immutable tuples
+const = comptime | tuple[comptime_data, ...]
+
+
+def check_const_pool_value(value: const) -> num | str | tuple[comptime_data, ...]:
     if value is None:
         internal_problem('cannot intern none')
     if isinstance(value, bool):
@@ -24,17 +30,58 @@ class Context:
         self.file = file
 
         # allow assignments of none, compilation should fail
-        self._const_pool = Pool[comptime]()
+        self._const_pool = Pool[const]()
         self._label_pool = Pool[str]()
 
+        # results of function calls evaluated at compile time, keyed by the function and the typed arguments
+        self._comptime_calls: dict[Hashable, ComptimeValue] = {}
+
+        # defined functions compiled for runtime calls, keyed by the function and the typed arguments
+        self._specializations: dict[Hashable, Specialization] = {}
+        self._subroutines: list[Specialization] = []
+
+        # counters reported in the debug output
+        self.statistics: collections.Counter[str] = collections.Counter()
+
     def intern_const(self, value: ComptimeValue | comptime) -> int:
         if isinstance(value, ComptimeValue):
             value = value.data
+        if isinstance(value, list):
+            return self._const_pool.intern(tuple(value))
+
         return self._const_pool.intern(value)
 
-    def get_const_pool(self) -> list[num | str]:
+    def get_const_pool(self) -> list[num | str | tuple[comptime_data, ...]]:
         return [check_const_pool_value(it) for it in self._const_pool]
 
+    def lookup_comptime_call(self, key: Hashable) -> Optional[ComptimeValue]:
+        value = self._comptime_calls.get(key)
+        self.statistics['comptime call hit' if value is not None else 'comptime call miss'] += 1
+
+        return value
+
+    def store_comptime_call(self, key: Hashable, value: ComptimeValue):
+        self._comptime_calls[key] = value
+
+    def lookup_specialization(self, key: Hashable) -> Optional[Specialization]:
+        return self._specializations.get(key)
+
+    def store_specialization(self, key: Hashable, specialization: Specialization):
+        self._specializations[key] = specialization
+
+    def intern_subroutine(self, specialization: Specialization) -> int:
+        """
+        Index of the specialization in the subroutine table, it is added on the first call.
+        """
+        if specialization.index is None:
+            specialization.index = len(self._subroutines)
+            self._subroutines.append(specialization)
+
+        return specialization.index
+
+    def get_subroutines(self) -> list[Subroutine]:
+        return [it.to_subroutine() for it in self._subroutines]
+
     def intern_label(self, label: str) -> int:
         return self._label_pool.intern(label)
 
@@ -0,0 +1,38 @@
+import collections
+
+from ._instruction import InstructionBuffer, Label, Item, remove_unused_labels, successors
+
+
+def eliminate_dead_code(buffer: InstructionBuffer, statistics: collections.Counter[str]):
+    """
+    Removes all instructions that cannot be reached from the first instruction and all labels that are no longer
+    targeted by a jump. Counts the removed instructions in statistics.
+    """
+    items = buffer.items()
+    reachable = _reachable(items)
+
+    result: list[Item] = []
+    for i, item in enumerate(items):
+        if isinstance(item, Label) or i in reachable:
+            result.append(item)
+        else:
+            statistics['dead code instruction'] += 1
+
+    buffer.replace(remove_unused_labels(result))
+
+
+def _reachable(items: list[Item]) -> set[int]:
+    labels = {it: i for i, it in enumerate(items) if isinstance(it, Label)}
+
+    reachable: set[int] = set()
+    worklist = [0] if len(items) > 0 else []
+
+    while len(worklist) > 0:
+        index = worklist.pop()
+        if index in reachable:
+            continue
+
+        reachable.add(index)
+        worklist.extend(successors(items, labels, index))
+
+    return reachable
@@ -1,9 +1,49 @@
+import functools
 import typing
 
 from colc.common import TextFile, fatal_problem
 from colc.frontend import ast
 
 
+class SymbolTable:
+    """
+    Definitions of a file and all its includes, keyed by the kind of definition and its name. Definitions of the file
+    shadow definitions of its includes, the includes are searched depth first starting with the last one.
+    """
+
+    def __init__(self, file: 'File'):
+        self._definitions: dict[tuple[type, str], ast.Definition] = {}
+
+        visited: set[int] = set()
+        frontier: list[File] = [file]
+
+        while len(frontier) > 0:
+            file = frontier.pop()
+            frontier.extend(file.includes)
+
+            # shared includes are only added once, the first occurrence shadows all others
+            if id(file) in visited:
+                continue
+            visited.add(id(file))
+
+            self._add_file(file)
+
+    def _add_file(self, file: 'File'):
+        defined: set[tuple[type, str]] = set()
+
+        for definition in file.definitions:
+            key = (type(definition), definition.identifier.name)
+
+            if key in defined:
+                fatal_problem('identifier is already defined', definition.identifier)
+            defined.add(key)
+
+            self._definitions.setdefault(key, definition)
+
+    def lookup(self, subtype: type, name: str) -> typing.Optional[ast.Definition]:
+        return self._definitions.get((subtype, name))
+
+
 class File:
     def __init__(self, source: TextFile, includes: list['File'], definitions: list[ast.Definition]):
         self.source = source
@@ -14,18 +54,12 @@ class File:
     def mappings(self) -> list[ast.MDefinition]:
         return [it for it in self.definitions if isinstance(it, ast.MDefinition)]
 
-    def _resolve(self, subtype: type, name: str) -> typing.Optional[ast.Definition]:
-        frontier: list[File] = [self]
+    @functools.cached_property
+    def symbols(self) -> SymbolTable:
+        return SymbolTable(self)
 
-        while len(frontier) > 0:
-            file = frontier.pop()
-            frontier.extend(file.includes)
-
-            for definition in file.definitions:
-                if isinstance(definition, subtype) and definition.identifier.name == name:
-                    return definition
-
-        return None
+    def _resolve(self, subtype: type, name: str) -> typing.Optional[ast.Definition]:
+        return self.symbols.lookup(subtype, name)
 
     def constraint_type(self, identifier: ast.Identifier) -> ast.CDefinitionType:
         definition = self._resolve(ast.CDefinitionType, identifier.name)
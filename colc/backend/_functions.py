@@ -8,7 +8,6 @@ from colc.common import (
     RuntimeValue,
     ComptimeValue,
     Type,
-    first,
     types,
     comptime,
 )
@@ -43,7 +42,14 @@ class DefinedFunction(Function):
         return None
 
 
-_builtins: list[BuiltinFunction] = []
+# builtins indexed by (name, arity), overloads are kept in registration order
+_builtins: dict[tuple[str, int], list[BuiltinFunction]] = {}
+
+# first builtin registered for a name, used to resolve calls
+_builtins_by_name: dict[str, BuiltinFunction] = {}
+
+# memo of (operator, *operand types) to the resolved builtin and its result type
+_operators: dict[tuple[Any, ...], tuple[BuiltinFunction, Type]] = {}
 
 
 def builtin(name: str, opcode: Opcode):
@@ -51,70 +57,87 @@ def builtin(name: str, opcode: Opcode):
         param_names = func.__code__.co_varnames
         annotations = func.__annotations__
 
-        _builtins.append(
-            BuiltinFunction(
-                name=name,
-                parameters=[Type.from_python(annotations[it]) for it in param_names],
-                returns=Type.from_python(annotations.get('return')),
-                opcode=opcode,
-                comptime=func,
-            )
+        function = BuiltinFunction(
+            name=name,
+            parameters=[Type.from_python(annotations[it]) for it in param_names],
+            returns=Type.from_python(annotations.get('return')),
+            opcode=opcode,
+            comptime=func,
         )
 
+        _builtins.setdefault((name, len(function.parameters)), []).append(function)
+        _builtins_by_name.setdefault(name, function)
+        _operators.clear()
+
         return func
 
     return decorator
 
 
-def _operator_find(name: str, n_params: int) -> BuiltinFunction:
-    operator = first(it for it in _builtins if it.name == name and len(it.parameters) == n_params)
+def _operator_find(name: str, n_params: int) -> list[BuiltinFunction]:
+    overloads = _builtins.get((name, n_params))
 
-    if operator is None:
+    if overloads is None:
         internal_problem(f'undefined operator: {name}')
 
-    return operator
-
-
-def _operator_unary_find_compatible(op: Operator, value: Type) -> BuiltinFunction:
-    operator = _operator_find(op, 1)
+    return overloads
 
-    if len(operator.parameters) != 1:
-        internal_problem(f'invalid unary operator: {op}')
-    if not operator.parameters[0].compatible(value):
-        fatal_problem(f'undefined operator {op} {value}', op)
 
-    return operator
+def _operator_unary_find_compatible(op: Operator, value: Type) -> tuple[BuiltinFunction, Type]:
+    for operator in _operator_find(op, 1):
+        if operator.parameters[0].compatible(value):
+            return operator, operator.returns
 
+    fatal_problem(f'undefined operator {op} {value}', op)
 
-def _operator_binary_find_compatible(op: Operator, left: Type, right: Type) -> BuiltinFunction:
-    operator = _operator_find(op, 2)
 
-    if len(operator.parameters) != 2:
-        internal_problem(f'invalid binary operator: {op}')
+def _operator_binary_find_compatible(op: Operator, left: Type, right: Type) -> tuple[BuiltinFunction, Type]:
+    overloads = _operator_find(op, 2)
 
     # prepend is special because return type depends on operands
     if op == Operator.PREPEND:
         if left.is_list or not right.is_list:
             fatal_problem(f'undefined operator {left} {op} {right}', op)
-    else:
-        if not operator.parameters[0].compatible(left) or not operator.parameters[1].compatible(right):
-            fatal_problem(f'undefined operator {left} {op} {right}', op)
 
-    return operator
+        return overloads[0], Type.lup((left, right)).as_list
+
+    for operator in overloads:
+        if operator.parameters[0].compatible(left) and operator.parameters[1].compatible(right):
+            return operator, operator.returns
+
+    fatal_problem(f'undefined operator {left} {op} {right}', op)
+
+
+def _operator_unary_resolve(op: Operator, value: Type) -> tuple[BuiltinFunction, Type]:
+    key = (op, value)
+
+    resolved = _operators.get(key)
+    if resolved is None:
+        resolved = _operator_unary_find_compatible(op, value)
+        _operators[key] = resolved
+
+    return resolved
+
+
+def _operator_binary_resolve(op: Operator, left: Type, right: Type) -> tuple[BuiltinFunction, Type]:
+    key = (op, left, right)
+
+    resolved = _operators.get(key)
+    if resolved is None:
+        resolved = _operator_binary_find_compatible(op, left, right)
+        _operators[key] = resolved
+
+    return resolved
 
 
 def operator_unary_infer(op: Operator, value: Value) -> RuntimeValue:
-    return RuntimeValue(_operator_unary_find_compatible(op, value.type).returns)
+    _, returns = _operator_unary_resolve(op, value.type)
+    return RuntimeValue(returns)
 
 
 def operator_binary_infer(op: Operator, left: Value, right: Value) -> RuntimeValue:
-    operator = _operator_binary_find_compatible(op, left.type, right.type)
-
-    # prepend is special create new return type depending on operands
-    if op == Operator.PREPEND:
-        return RuntimeValue(Type(left.type.values | right.type.values, list=True))
-    else:
-        return RuntimeValue(operator.returns)
+    _, returns = _operator_binary_resolve(op, left.type, right.type)
+    return RuntimeValue(returns)
 
 
 def comparison_infer(comp: Comparison, left: Value, right: Value) -> RuntimeValue:
@@ -122,8 +145,7 @@ def comparison_infer(comp: Comparison, left: Value, right: Value) -> RuntimeValu
 
 
 def operator_unary_evaluate(op: Operator, value: ComptimeValue) -> ComptimeValue:
-    operator = _operator_unary_find_compatible(op, value.type)
-    inferred = operator_unary_infer(op, value).type
+    operator, inferred = _operator_unary_resolve(op, value.type)
 
     result = operator.comptime(value.data)
     if result is None:
@@ -133,8 +155,7 @@ def operator_unary_evaluate(op: Operator, value: ComptimeValue) -> ComptimeValue
 
 
 def operator_binary_evaluate(op: Operator, left: ComptimeValue, right: ComptimeValue) -> ComptimeValue:
-    operator = _operator_binary_find_compatible(op, left.type, right.type)
-    inferred = operator_binary_infer(op, left, right).type
+    operator, inferred = _operator_binary_resolve(op, left.type, right.type)
 
     try:
         result = operator.comptime(left.data, right.data)
@@ -147,7 +168,7 @@ def operator_binary_evaluate(op: Operator, left: ComptimeValue, right: ComptimeV
 
 
 def resolve_function(file: File, identifier: ast.Identifier) -> Function:
-    function = first(it for it in _builtins if it.name == identifier.name)
+    function = _builtins_by_name.get(identifier.name)
     if function is not None:
         return function
 
@@ -1,9 +1,15 @@
+import itertools
+from typing import Optional
+
+from colc.common import internal_problem
 from colc.frontend import Operator
 
 from ._opcode import Opcode
 
 
 class Label:
+    __slots__ = ('name',)
+
     def __init__(self, name: str):
         self.name = name
 
@@ -12,6 +18,8 @@ class Label:
 
 
 class Instruction:
+    __slots__ = ('opcode', 'argument')
+
     def __init__(self, opcode: Opcode, argument: int | Label = 0):
         self.opcode = opcode
         self.argument = argument
@@ -78,6 +86,66 @@ class Instruction:
         return Instruction(opcode)
 
 
+Item = Instruction | Label
+
+_jumps = frozenset(it for it in Opcode if it.is_jmp)
+
+# instructions after which the execution never continues with the next instruction
+_terminators = frozenset({Opcode.FAIL, Opcode.JMP_F, Opcode.JMP_B, Opcode.RET})
+
+
+def remove_unused_labels(items: list[Item]) -> list[Item]:
+    """
+    Drops all labels from items that are not the target of any jump.
+    """
+    used = {it.argument for it in items if isinstance(it, Instruction) and it.opcode.is_jmp}
+    return [it for it in items if not isinstance(it, Label) or it in used]
+
+
+def successors(items: list[Item], labels: dict[Label, int], index: int) -> list[int]:
+    """
+    Indices of the items in items that can be executed right after the item at index, labels fall through to the
+    next item. The labels map every label in items to its index.
+    """
+    item = items[index]
+    result: list[int] = []
+
+    if isinstance(item, Instruction) and item.opcode.is_jmp:
+        result.append(labels[item.argument_label])
+    if (isinstance(item, Label) or item.opcode not in _terminators) and index + 1 < len(items):
+        result.append(index + 1)
+
+    return result
+
+
+def next_instruction(items: list[Item], index: int) -> Optional[int]:
+    """
+    Index of the first instruction in items at or after index, labels in between are skipped.
+    """
+    while index < len(items):
+        if isinstance(items[index], Instruction):
+            return index
+
+        index += 1
+
+    return None
+
+
+def _prefixes(argument: int) -> int:
+    """
+    Number of EXT prefixes required to encode the argument.
+    """
+    if argument < 0:
+        internal_problem(f'negative argument {argument}')
+
+    prefixes = 0
+    while argument > 0xFF:
+        argument >>= 8
+        prefixes += 1
+
+    return prefixes
+
+
 class InstructionBuffer:
     def __init__(self):
         self.instructions: list[Instruction] = []
@@ -89,19 +157,85 @@ class InstructionBuffer:
     def add_label(self, label: Label):
         self.labels[label] = len(self.instructions)
 
-    def build(self) -> bytes:
-        builder = bytearray()
+    def items(self) -> list[Item]:
+        """
+        Instructions in order with every label placed right before the instruction it marks.
+        """
+        marks: dict[int, list[Label]] = {}
+        for label, index in self.labels.items():
+            marks.setdefault(index, []).append(label)
 
+        items: list[Item] = []
         for i, instr in enumerate(self.instructions):
-            builder.append(instr.opcode)
-
-            if not instr.opcode.is_jmp:
-                builder.append(instr.argument_value)
+            items.extend(marks.get(i, []))
+            items.append(instr)
+
+        items.extend(marks.get(len(self.instructions), []))
+        return items
+
+    def replace(self, items: list[Item]):
+        """
+        Replaces the content of the buffer with instructions and labels in the format of items.
+        """
+        self.instructions = []
+        self.labels = {}
+
+        for item in items:
+            if isinstance(item, Label):
+                self.add_label(item)
             else:
-                label = instr.argument_label
-                index = self.labels.get(label)
-                assert index is not None
+                self.add(item)
+
+    def _arguments(self, prefixes: list[int]) -> list[int]:
+        # offset of every instruction including its prefixes, in units of two bytes
+        offsets = list(itertools.accumulate((it + 1 for it in prefixes), initial=0))
+
+        arguments = []
+        for i, instr in enumerate(self.instructions):
+            if instr.opcode not in _jumps:
+                arguments.append(instr.argument_value)
+                continue
+
+            index = self.labels.get(instr.argument_label)
+            assert index is not None
+
+            # jumps are relative to the jump itself and target the first prefix of the instruction at the label
+            arguments.append(abs(offsets[i] + prefixes[i] - offsets[index]))
+
+        return arguments
+
+    def build(self) -> bytes:
+        prefixes = [0] * len(self.instructions)
+        arguments = self._arguments(prefixes)
 
-                builder.append(abs(i - index))
+        # most mappings only use one byte arguments and require no prefixes at all
+        if all(0 <= it <= 0xFF for it in arguments):
+            return bytes(itertools.chain.from_iterable(zip((it.opcode for it in self.instructions), arguments)))
+
+        # jump relaxation: a prefix increases jump distances, repeat until all jumps fit (prefixes only ever grow)
+        while True:
+            changed = False
+
+            for i, argument in enumerate(arguments):
+                required = _prefixes(argument)
+
+                if required > prefixes[i]:
+                    prefixes[i] = required
+                    changed = True
+
+            if not changed:
+                break
+
+            arguments = self._arguments(prefixes)
+
+        builder = bytearray()
+
+        for instr, count, argument in zip(self.instructions, prefixes, arguments):
+            for shift in range(count, 0, -1):
+                builder.append(Opcode.EXT)
+                builder.append((argument >> shift * 8) & 0xFF)
+
+            builder.append(instr.opcode)
+            builder.append(argument & 0xFF)
 
-        return builder
+        return bytes(builder)
@@ -0,0 +1,243 @@
+import collections
+from typing import Optional, Tuple
+
+from ._instruction import Instruction, InstructionBuffer, Label, Item
+from ._opcode import Opcode
+from ._utils import Allocator
+
+# a computation of one value: the index of its first and last instruction
+Segment = Tuple[int, int]
+
+# instructions that only push a value, which does not depend on any slot
+_constants = frozenset(
+    {
+        Opcode.CONST,
+        Opcode.KIND,
+        Opcode.TRUE,
+        Opcode.FALSE,
+        Opcode.INT,
+        Opcode.FLOAT,
+        Opcode.NONE,
+        Opcode.LIST,
+        Opcode.LIST_CONST,
+    }
+)
+
+# operations without side effects that cannot fail at runtime by the number of operands they pop
+_total_operations = {
+    Opcode.STR_OF: 1,
+    Opcode.EQL: 2,
+    Opcode.NEQ: 2,
+}
+
+# operations without side effects that fail at runtime if an operand has an unexpected type, e.g. the value of an
+# attribute, by the number of operands they pop
+_partial_operations = {
+    Opcode.NEG: 1,
+    Opcode.NOT: 1,
+    Opcode.LENGTH: 1,
+    Opcode.ADD: 2,
+    Opcode.SUB: 2,
+    Opcode.MUL: 2,
+    Opcode.AND: 2,
+    Opcode.OR: 2,
+    Opcode.LES: 2,
+    Opcode.LEQ: 2,
+    Opcode.GRE: 2,
+    Opcode.GEQ: 2,
+    Opcode.CONCAT: 2,
+    Opcode.PREPEND: 2,
+}
+
+# operations that read nodes by the number of operands they pop, only invariant in loops without barriers
+_node_reads = {
+    Opcode.ATTR: 1,
+    Opcode.KIND_OF: 1,
+    Opcode.CHILDREN: 1,
+    Opcode.WHERE: 2,
+}
+
+# instructions that change the value of the local slot in their argument
+_slot_writes = frozenset({Opcode.STORE, Opcode.NEXT, Opcode.RESET})
+
+# instructions that can change nodes
+_barriers = frozenset({Opcode.EXEC, Opcode.CALL})
+
+# instructions with an effect that has to happen before a moved operation can fail
+_effects = frozenset({Opcode.EXEC, Opcode.CALL, Opcode.FAIL})
+
+
+def hoist_loop_invariants(buffer: InstructionBuffer, allocator: Allocator, statistics: collections.Counter[str]):
+    """
+    Moves computations in the body of for loops, which result in the same value on every iteration, in front of the
+    loop and stores their result in a temporary slot. Only computations executed on every iteration are moved, the
+    moved code is guarded by the check for the first element and is never executed for empty lists. Operations that can
+    fail are only moved if no instruction with an effect is executed before them. Counts the moved computations in
+    statistics.
+    """
+    loops = sum(1 for it in buffer.items() if isinstance(it, Instruction) and it.opcode == Opcode.JMP_B)
+
+    # inner loops end first, indices change with every moved computation
+    for k in range(loops):
+        items = buffer.items()
+        end = [i for i, it in enumerate(items) if isinstance(it, Instruction) and it.opcode == Opcode.JMP_B][k]
+
+        result = _hoist(items, end, allocator, statistics)
+        if result is not None:
+            buffer.replace(result)
+
+
+def _hoist(
+    items: list[Item],
+    end: int,
+    allocator: Allocator,
+    statistics: collections.Counter[str],
+) -> Optional[list[Item]]:
+    labels = {it: i for i, it in enumerate(items) if isinstance(it, Label)}
+
+    jump = items[end]
+    assert isinstance(jump, Instruction)
+    start = labels[jump.argument_label]
+
+    # the loop starts with the check for the next element: HAS_NEXT and JMP_FF to the end
+    guard = items[start + 1 : start + 3]
+    if [it.opcode if isinstance(it, Instruction) else None for it in guard] != [Opcode.HAS_NEXT, Opcode.JMP_FF]:
+        return None
+
+    # the loop can only be entered at the start
+    inside = set(items[start : end + 1])
+    for i, item in enumerate(items):
+        if (start <= i <= end) or not isinstance(item, Instruction) or not item.opcode.is_jmp:
+            continue
+        if item.argument_label in inside:
+            return None
+
+    body = [it for it in items[start : end + 1] if isinstance(it, Instruction)]
+    written = {it.argument_value for it in body if it.opcode in _slot_writes}
+    barrier = any(it.opcode in _barriers for it in body)
+
+    segments = _invariant_segments(items, labels, start + 3, end, written, barrier)
+    if len(segments) == 0:
+        return None
+
+    # equal computations share one temporary slot
+    preheader: list[Item] = list(guard)
+    temporaries: dict[Tuple, int] = {}
+    replaced: dict[int, Segment] = {}
+
+    for first, last in segments:
+        key = _key(items, first, last)
+
+        if key not in temporaries:
+            temporaries[key] = allocator.alloc_unused()
+            preheader.extend(items[first : last + 1])
+            preheader.append(Instruction.new_store(temporaries[key]))
+
+        replaced[first] = (first, last)
+        statistics['loop invariant'] += 1
+
+    result: list[Item] = items[:start] + preheader
+
+    i = start
+    while i < len(items):
+        if i in replaced:
+            first, last = replaced[i]
+            result.append(Instruction.new_load(temporaries[_key(items, first, last)]))
+            i = last + 1
+        else:
+            result.append(items[i])
+            i += 1
+
+    return result
+
+
+def _key(items: list[Item], first: int, last: int) -> Tuple:
+    return tuple((it.opcode, it.argument) for it in items[first : last + 1] if isinstance(it, Instruction))
+
+
+def _pops(item: Item, written: set[int], barrier: bool, effects: bool) -> Optional[Tuple[int, bool]]:
+    """
+    Number of operands of a computation and whether its result is invariant if all operands are invariant. None if the
+    item is no computation. Effects tells whether an instruction with an effect is executed before the item.
+    """
+    if not isinstance(item, Instruction):
+        return None
+
+    if item.opcode == Opcode.LOAD:
+        return 0, item.argument_value not in written
+    if item.opcode in _constants:
+        return 0, True
+    if item.opcode in _total_operations:
+        return _total_operations[item.opcode], True
+    if item.opcode in _partial_operations:
+        return _partial_operations[item.opcode], not effects
+    if item.opcode in _node_reads:
+        return _node_reads[item.opcode], not barrier and not effects
+
+    return None
+
+
+def _invariant_segments(
+    items: list[Item],
+    labels: dict[Label, int],
+    begin: int,
+    end: int,
+    written: set[int],
+    barrier: bool,
+) -> list[Segment]:
+    """
+    Maximal invariant computations between begin and end, which contain at least one operation and are executed every
+    time the instruction at begin is executed.
+    """
+    segments: list[Segment] = []
+
+    # values computed since the last label or other instruction: their segment and whether they are invariant
+    stack: list[Tuple[Segment, bool]] = []
+
+    # index of the furthest label targeted by a jump so far, everything before it is executed conditionally
+    reach = begin
+
+    # whether an instruction with an effect was executed before
+    effects = False
+
+    def close(values: list[Tuple[Segment, bool]]):
+        for (first, last), invariant in values:
+            if invariant and first < last:
+                segments.append((first, last))
+
+    for i in range(begin, end):
+        item = items[i]
+        effect = _pops(item, written, barrier, effects)
+
+        if effect is None:
+            close(stack)
+            stack.clear()
+
+            if isinstance(item, Instruction) and item.opcode.is_jmp:
+                reach = max(reach, labels[item.argument_label])
+            if isinstance(item, Instruction) and item.opcode in _effects:
+                effects = True
+
+            continue
+
+        pops, invariant = effect
+        if pops > len(stack):
+            close(stack)
+            stack.clear()
+            stack.append(((i, i), False))
+            continue
+
+        operands = stack[len(stack) - pops :]
+        del stack[len(stack) - pops :]
+
+        first = operands[0][0][0] if pops > 0 else i
+        invariant = invariant and all(it[1] for it in operands) and reach <= first
+
+        if invariant:
+            stack.append(((first, i), True))
+        else:
+            close(operands)
+            stack.append(((i, i), False))
+
+    close(stack)
+    return segments
@@ -6,3 +6,6 @@ class Mapping:
     name: str
     labels: list[int]
     code: bytes
+
+    # number of local slots, runtimes can allocate the frame upfront
+    slots: int
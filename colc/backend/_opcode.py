@@ -11,6 +11,12 @@ class Opcode(enum.IntEnum):
     DROP = 0x05
     FAIL = 0x06
 
+    # prefix that extends the argument of the next instruction by one byte
+    EXT = 0x07
+
+    # stores the value in the local slot and keeps it on the stack, fused STORE and LOAD of the same slot
+    TEE = 0x08
+
     # node interaction
     ATTR = 0x10
     KIND_OF = 0x11
@@ -38,6 +44,10 @@ class Opcode(enum.IntEnum):
     POW = 0x30
     CONCAT = 0x31
 
+    # adds or subtracts the argument, fused INT and ADD or SUB
+    ADD_INT = 0x32
+    SUB_INT = 0x33
+
     # const values
     TRUE = 0x40
     FALSE = 0x41
@@ -50,6 +60,9 @@ class Opcode(enum.IntEnum):
     JMP_FF = 0x51
     JMP_B = 0x52
 
+    # jumps forward if the two values are not equal, fused EQL and JMP_FF
+    JMP_FNE = 0x53
+
     # lists
     LIST = 0x60
     PREPEND = 0x61
@@ -59,6 +72,11 @@ class Opcode(enum.IntEnum):
     NEXT = 0x65
     HAS_NEXT = 0x66
     RESET = 0x67
+    LIST_CONST = 0x68
+
+    # functions
+    CALL = 0x70
+    RET = 0x71
 
     @property
     def is_jmp(self) -> bool:
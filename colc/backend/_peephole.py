@@ -0,0 +1,189 @@
+import collections
+from typing import Optional
+
+from ._instruction import (
+    Instruction,
+    InstructionBuffer,
+    Label,
+    Item,
+    remove_unused_labels,
+    next_instruction,
+    successors,
+)
+from ._opcode import Opcode
+
+# instructions that only push a value and have no other effect
+_pushes = frozenset(
+    {
+        Opcode.CONST,
+        Opcode.KIND,
+        Opcode.TRUE,
+        Opcode.FALSE,
+        Opcode.INT,
+        Opcode.FLOAT,
+        Opcode.NONE,
+        Opcode.LOAD,
+        Opcode.LIST,
+    }
+)
+
+# instructions that read the local slot in their argument
+_slot_reads = frozenset({Opcode.LOAD, Opcode.HAS_NEXT, Opcode.NEXT, Opcode.RESET})
+
+_unconditional_jumps = frozenset({Opcode.JMP_F, Opcode.JMP_B})
+
+
+def optimize_peephole(buffer: InstructionBuffer, statistics: collections.Counter[str]):
+    """
+    Rewrites wasteful instruction sequences until no pattern matches anymore. Counts the hits of every pattern in
+    statistics.
+    """
+    items = buffer.items()
+
+    while True:
+        hits = statistics.total()
+
+        items = remove_unused_labels(items)
+        items = _thread_jumps(items, statistics)
+        items = _rewrite(items, statistics)
+
+        if statistics.total() == hits:
+            break
+
+    buffer.replace(items)
+
+
+def _is_ret(item: Item) -> bool:
+    return isinstance(item, Instruction) and item.opcode == Opcode.RET
+
+
+def _thread_jumps(items: list[Item], statistics: collections.Counter[str]) -> list[Item]:
+    labels = {it: i for i, it in enumerate(items) if isinstance(it, Label)}
+
+    def target(label: Label) -> Optional[int]:
+        return next_instruction(items, labels[label])
+
+    def follow(label: Label) -> Label:
+        # follow chains of unconditional jumps, a cycle is an infinite loop and is left untouched
+        visited = {label}
+
+        while (index := target(label)) is not None:
+            instr = items[index]
+            assert isinstance(instr, Instruction)
+
+            if instr.opcode not in _unconditional_jumps or instr.argument_label in visited:
+                break
+
+            label = instr.argument_label
+            visited.add(label)
+
+        return label
+
+    result: list[Item] = []
+
+    for i, item in enumerate(items):
+        if not isinstance(item, Instruction) or not item.opcode.is_jmp:
+            result.append(item)
+            continue
+
+        label = follow(item.argument_label)
+        forward = labels[label] > i
+
+        # conditional jumps can only jump forward
+        if label is not item.argument_label and (forward or item.opcode in _unconditional_jumps):
+            opcode = (
+                item.opcode if item.opcode not in _unconditional_jumps else Opcode.JMP_F if forward else Opcode.JMP_B
+            )
+
+            item = Instruction.new_jmp(opcode, label)
+            statistics['peephole jump thread'] += 1
+
+        # an unconditional jump to the next instruction does nothing
+        if item.opcode == Opcode.JMP_F and target(item.argument_label) == next_instruction(items, i + 1):
+            statistics['peephole jump next'] += 1
+            continue
+
+        # an unconditional jump to a return can return right away
+        index = target(item.argument_label)
+        if item.opcode in _unconditional_jumps and index is not None and _is_ret(items[index]):
+            statistics['peephole jump return'] += 1
+            item = Instruction(Opcode.RET)
+
+        result.append(item)
+
+    return result
+
+
+def _rewrite(items: list[Item], statistics: collections.Counter[str]) -> list[Item]:
+    live = _live_slots(items)
+
+    result: list[Item] = []
+
+    for i, item in enumerate(items):
+        last = result[-1] if len(result) > 0 else None
+
+        if not isinstance(item, Instruction) or not isinstance(last, Instruction):
+            result.append(item)
+            continue
+
+        # the value stays on the stack if the slot is not read again before it is overwritten
+        if (
+            item.opcode == Opcode.LOAD
+            and last.opcode == Opcode.STORE
+            and last.argument == item.argument
+            and item.argument_value not in live[i]
+        ):
+            result.pop()
+            statistics['peephole store load'] += 1
+            continue
+
+        if item.opcode == Opcode.JMP_FF and last.opcode == Opcode.TRUE:
+            result.pop()
+            statistics['peephole constant branch'] += 1
+            continue
+
+        if item.opcode == Opcode.JMP_FF and last.opcode == Opcode.FALSE:
+            result[-1] = Instruction.new_jmp(Opcode.JMP_F, item.argument_label)
+            statistics['peephole constant branch'] += 1
+            continue
+
+        if item.opcode == Opcode.DROP and last.opcode in _pushes:
+            result.pop()
+            statistics['peephole push drop'] += 1
+            continue
+
+        result.append(item)
+
+    return result
+
+
+def _live_slots(items: list[Item]) -> list[set[int]]:
+    """
+    Slots that are live after every item, i.e. slots which might be read before they are overwritten.
+    """
+    labels = {it: i for i, it in enumerate(items) if isinstance(it, Label)}
+    following = [successors(items, labels, i) for i in range(len(items))]
+
+    live_in: list[set[int]] = [set() for _ in items]
+    live_out: list[set[int]] = [set() for _ in items]
+
+    changed = True
+    while changed:
+        changed = False
+
+        for i in reversed(range(len(items))):
+            live_out[i] = set().union(*(live_in[it] for it in following[i]))
+
+            live = live_out[i]
+            item = items[i]
+
+            if isinstance(item, Instruction) and item.opcode == Opcode.STORE:
+                live = live - {item.argument_value}
+            if isinstance(item, Instruction) and item.opcode in _slot_reads:
+                live = live | {item.argument_value}
+
+            if live != live_in[i]:
+                live_in[i] = live
+                changed = True
+
+    return live_out
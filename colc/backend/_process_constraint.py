@@ -1,6 +1,6 @@
 from typing import Collection, Any, Optional
 
-from colc.common import internal_problem, ComptimeValue, AnyValue, fatal_problem
+from colc.common import ComptimeValue, AnyValue, fatal_problem
 from colc.frontend import ast, Quantifier, Comparison
 
 from ._context import Context
@@ -25,11 +25,15 @@ class VisitorImpl(VisitorWithScope):
         super().__init__()
         self.ctx = ctx
 
+        # constraint types currently expanded, innermost last
+        self.expanded: list[ast.CDefinitionType] = []
+
     def accept_expr(self, expr: ast.Expression) -> ComptimeValue:
         value = process_expression(self.ctx, self.scope, expr)
 
+        # the evaluation can run out of budget, e.g. a function that recurses too deep
         if value is None:
-            internal_problem('non comptime value in constraint')
+            fatal_problem('expression cannot be evaluated at compile time', expr)
 
         return value
 
@@ -101,15 +105,17 @@ class VisitorImpl(VisitorWithScope):
         constraint = self.ctx.file.constraint_type(stmt.constraint.identifier)
         constraint_scope = self.new_scope_for_call(stmt.constraint, constraint.parameters)
 
-        return LExpression(
-            LFunction.WITH,
-            [
-                self.accept_label(stmt.label),
-                constraint.kind.name,
-                self.accept_predicate(stmt.predicate),
-                self.accept_with_scope(constraint_scope, constraint.block),
-            ],
-        )
+        if constraint in self.expanded:
+            fatal_problem('recursive constraint', stmt.constraint.identifier)
+
+        label = self.accept_label(stmt.label)
+        predicate = self.accept_predicate(stmt.predicate)
+
+        self.expanded.append(constraint)
+        block = self.accept_with_scope(constraint_scope, constraint.block)
+        self.expanded.pop()
+
+        return LExpression(LFunction.WITH, [label, constraint.kind.name, predicate, block])
 
     def p_block(self, block: ast.PBlock) -> LExpression:
         return self.accept_block(block.quantifier, block.statements)
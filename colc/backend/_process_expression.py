@@ -1,11 +1,14 @@
-from typing import Optional
+import dataclasses
+import enum
+from typing import Optional, Hashable, cast
 
-from colc.common import internal_problem, ComptimeValue, NoneValue, unreachable, HasLocation, types, fatal_problem, Type
+from colc.common import ComptimeValue, NoneValue, unreachable, types, fatal_problem, Type
 from colc.frontend import ast
 
 from ._scope import Scope, VisitorWithScope, ComptimeDefinition
 from ._context import Context
-from ._utils import check_arguments, check_assignment, check_compatible
+from ._config import Config
+from ._utils import check_arguments, check_assignment, check_compatible, typed_key
 from ._functions import (
     operator_binary_evaluate,
     operator_unary_evaluate,
@@ -15,86 +18,223 @@ from ._functions import (
 )
 
 
-class CannotProcessAtComptime(Exception):
-    def __init__(self, what: HasLocation):
-        self.what = what
+class CompletionKind(enum.Enum):
+    NORMAL = enum.auto()
+    RETURN = enum.auto()
+    RUNTIME = enum.auto()
 
 
-class ReturnAtComptime(Exception):
-    def __init__(self, value: ComptimeValue):
-        self.value = value
+@dataclasses.dataclass(slots=True, frozen=True)
+class Completion:
+    """
+    Result of a statement at compile time. Runtime completions abort the evaluation, the statement can only be
+    evaluated at runtime.
+    """
+
+    kind: CompletionKind
+    value: Optional[ComptimeValue] = None
+
+    @staticmethod
+    def returns(value: ComptimeValue) -> 'Completion':
+        return Completion(CompletionKind.RETURN, value)
+
+
+NORMAL = Completion(CompletionKind.NORMAL)
+RUNTIME = Completion(CompletionKind.RUNTIME)
+
+
+@dataclasses.dataclass(slots=True)
+class Budget:
+    """
+    Resources of the compile time evaluation, shared by all function bodies evaluated for one expression. The evaluation
+    falls back to runtime code once a resource is exhausted.
+    """
+
+    # remaining loop iterations
+    iterations: int
+
+    # remaining statements
+    fuel: int
+
+    # remaining nesting of function calls
+    depth: int
+
+    # calls currently evaluated, a call with the same arguments would never terminate
+    active: set[Hashable] = dataclasses.field(default_factory=set)
+
+    @staticmethod
+    def from_config(config: Config) -> 'Budget':
+        return Budget(iterations=config.comptime_iterations, fuel=config.comptime_fuel, depth=config.inline_depth)
+
+    def consume_iterations(self, iterations: int) -> bool:
+        if iterations > self.iterations:
+            return False
+
+        self.iterations -= iterations
+        return True
+
+    def consume_fuel(self) -> bool:
+        if self.fuel == 0:
+            return False
+
+        self.fuel -= 1
+        return True
+
+
+Annotations = dict[ast.Expression, Optional[ComptimeValue]]
+
+
+def analyze_expression(ctx: Context, scope: Scope, expr: ast.Expression) -> Annotations:
+    """
+    Annotates every node of the expression with its value at compile time, or None if the node can only be evaluated
+    at runtime. Every node is visited exactly once.
+    """
+    visitor = AnalysisVisitorImpl(ctx, scope)
+    visitor.accept_expr(expr)
+
+    return visitor.annotations
 
 
 def process_expression(ctx: Context, scope: Scope, expr: ast.Expression) -> Optional[ComptimeValue]:
-    try:
-        return ComptimeVisitorImpl(ctx, scope).accept(expr)
-    except CannotProcessAtComptime:
-        return None
-    except ReturnAtComptime:
-        internal_problem('leaked return exception')
+    return ComptimeVisitorImpl(ctx, scope).accept_expr(expr)
 
 
 class ComptimeVisitorImpl(VisitorWithScope):
-    def __init__(self, ctx: Context, scope: Scope):
+    """
+    Evaluates expressions and function bodies at compile time. Expressions result in None and statements in a runtime
+    completion if they can only be evaluated at runtime.
+    """
+
+    def __init__(self, ctx: Context, scope: Scope, budget: Optional[Budget] = None):
         super().__init__(scope)
         self.ctx = ctx
+        self.budget = budget or Budget.from_config(ctx.config)
+
+    def accept_expr(self, expr: ast.Expression) -> Optional[ComptimeValue]:
+        # dispatch directly instead of through accept, deeply nested expressions are limited by the recursion depth
+        return getattr(self, expr.rule)(expr)
+
+    def annotate(self, expr: ast.Expression, value: Optional[ComptimeValue]):
+        """
+        Called for expressions that are evaluated without accept_expr.
+        """
+
+    def expression_unary(self, expr: ast.ExpressionUnary) -> Optional[ComptimeValue]:
+        value = self.accept_expr(expr.expression)
+        if value is None:
+            return None
 
-    def expression_unary(self, expr: ast.ExpressionUnary) -> ComptimeValue:
-        value = self.accept(expr.expression)
         return operator_unary_evaluate(expr.operator, value)
 
-    def expression_binary(self, expr: ast.ExpressionBinary) -> ComptimeValue:
-        left = self.accept(expr.left)
-        right = self.accept(expr.right)
+    def expression_binary(self, expr: ast.ExpressionBinary) -> Optional[ComptimeValue]:
+        # right nested chains, e.g. lowered list literals, are evaluated iteratively to keep the recursion depth constant
+        chain = [expr]
+        while isinstance(chain[-1].right, ast.ExpressionBinary):
+            chain.append(chain[-1].right)
 
-        return operator_binary_evaluate(expr.operator, left, right)
+        lefts = [self.accept_expr(it.left) for it in chain]
+        right = self.accept_expr(chain[-1].right)
 
-    def expression_literal(self, expr: ast.ExpressionLiteral) -> ComptimeValue:
+        for node, left in zip(reversed(chain), reversed(lefts)):
+            if left is None or right is None:
+                right = None
+            else:
+                right = operator_binary_evaluate(node.operator, left, right)
+
+            if node is not expr:
+                self.annotate(node, right)
+
+        return right
+
+    def expression_literal(self, expr: ast.ExpressionLiteral) -> Optional[ComptimeValue]:
         return expr.value
 
-    def expression_ref(self, expr: ast.ExpressionRef) -> ComptimeValue:
+    def expression_ref(self, expr: ast.ExpressionRef) -> Optional[ComptimeValue]:
         value = self.scope.lookup(expr.identifier).value
 
         if isinstance(value, ComptimeValue):
             return value
         else:
-            raise CannotProcessAtComptime(expr)
+            return None
+
+    def expression_attr(self, expr: ast.ExpressionAttr) -> Optional[ComptimeValue]:
+        return None
 
-    def expression_attr(self, expr: ast.ExpressionAttr) -> ComptimeValue:
-        raise CannotProcessAtComptime(expr)
+    def accept_arguments(self, call: ast.Call) -> Optional[list[ComptimeValue]]:
+        args = [self.accept_expr(it) for it in call.arguments]
 
-    def accept_builtin_function(self, call: ast.Call, func: BuiltinFunction) -> ComptimeValue:
+        if any(it is None for it in args):
+            return None
+
+        return cast(list[ComptimeValue], args)
+
+    def accept_builtin_function(self, call: ast.Call, func: BuiltinFunction) -> Optional[ComptimeValue]:
         check_arguments(call, func)
 
-        args = []
-        for arg, param in zip(call.arguments, func.parameters):
-            value = self.accept(arg)
-            check_compatible(arg, value, param)
+        args = self.accept_arguments(call)
+        if args is None:
+            return None
 
-            args.append(value.data)
+        for arg, value, param in zip(call.arguments, args, func.parameters):
+            check_compatible(arg, value, param)
 
-        result = func.comptime(*args)
+        result = func.comptime(*(it.data for it in args))
         if result is None:
-            raise CannotProcessAtComptime(call.identifier)
+            return None
 
         return ComptimeValue(result, type=Type.from_python(type(result)))
 
-    def accept_defined_function(self, call: ast.Call, func: DefinedFunction) -> ComptimeValue:
+    def accept_defined_function(self, call: ast.Call, func: DefinedFunction) -> Optional[ComptimeValue]:
         check_arguments(call, func)
 
-        _, scope = self.scope.new_call_scope(call.identifier.name)
-        for arg, param in zip(call.arguments, func.definition.parameters):
-            value = self.accept(arg)
+        args = self.accept_arguments(call)
+        if args is None:
+            return None
+
+        # function bodies have no side effects at compile time, a failure aborts the compilation and is never cached
+        key = (func.definition, tuple((it.type, typed_key(it.data)) for it in args))
+
+        value = self.ctx.lookup_comptime_call(key)
+        if value is not None:
+            return value
+
+        if key in self.budget.active or self.budget.depth == 0:
+            return None
+
+        self.budget.active.add(key)
+        self.budget.depth -= 1
 
+        value = self.invoke_defined_function(call, func, args)
+
+        self.budget.active.remove(key)
+        self.budget.depth += 1
+
+        if value is not None:
+            self.ctx.store_comptime_call(key, value)
+
+        return value
+
+    def invoke_defined_function(
+        self,
+        call: ast.Call,
+        func: DefinedFunction,
+        args: list[ComptimeValue],
+    ) -> Optional[ComptimeValue]:
+        _, scope = self.scope.new_call_scope(call.identifier.name)
+        for param, value in zip(func.definition.parameters, args):
             scope.insert_comptime(param, value, final=True)
 
-        try:
-            self.accept_with_scope(scope, func.definition.block)
-            return NoneValue
-        except ReturnAtComptime as e:
-            return e.value
+        # the body is evaluated by a plain visitor, its nodes are not part of the analyzed expression
+        completion = ComptimeVisitorImpl(self.ctx, scope, self.budget).accept(func.definition.block)
+
+        if completion.kind == CompletionKind.RUNTIME:
+            return None
+        if completion.kind == CompletionKind.RETURN:
+            return completion.value
 
-    def expression_call(self, expr: ast.ExpressionCall) -> ComptimeValue:
+        return NoneValue
+
+    def expression_call(self, expr: ast.ExpressionCall) -> Optional[ComptimeValue]:
         func = resolve_function(self.ctx.file, expr.call.identifier)
 
         if isinstance(func, BuiltinFunction):
@@ -105,52 +245,152 @@ class ComptimeVisitorImpl(VisitorWithScope):
 
         unreachable()
 
-    def expression_empty_list(self, _: ast.ExpressionEmptyList) -> ComptimeValue:
+    def expression_empty_list(self, _: ast.ExpressionEmptyList) -> Optional[ComptimeValue]:
         return ComptimeValue([], types.VOID_LIST)
 
-    def f_block(self, expr: ast.FBlock):
-        for stmt in expr.statements:
-            self.accept(stmt)
+    def f_block(self, block: ast.FBlock) -> Completion:
+        for stmt in block.statements:
+            if not self.budget.consume_fuel():
+                return RUNTIME
+
+            completion = self.accept(stmt)
+
+            if completion is not NORMAL:
+                return completion
+
+        return NORMAL
+
+    def f_statement_block(self, stmt: ast.FStatementBlock) -> Completion:
+        return self.accept_with_child_scope(stmt.block)
 
-    def f_statement_return(self, stmt: ast.FStatementReturn):
+    def f_statement_return(self, stmt: ast.FStatementReturn) -> Completion:
         if stmt.expression is None:
-            raise ReturnAtComptime(NoneValue)
-        else:
-            raise ReturnAtComptime(self.accept(stmt.expression))
+            return Completion.returns(NoneValue)
+
+        value = self.accept_expr(stmt.expression)
+        if value is None:
+            return RUNTIME
+
+        return Completion.returns(value)
+
+    def f_statement_define(self, stmt: ast.FStatementDefine) -> Completion:
+        value = self.accept_expr(stmt.expression)
+        if value is None:
+            return RUNTIME
 
-    def f_statement_define(self, stmt: ast.FStatementDefine):
-        value = self.accept(stmt.expression)
         self.scope.insert_comptime(stmt.identifier, value, final=not stmt.qualifier.is_var)
+        return NORMAL
 
-    def f_statement_assign(self, stmt: ast.FStatementAssign):
-        value = self.accept(stmt.expression)
+    def f_statement_assign(self, stmt: ast.FStatementAssign) -> Completion:
+        value = self.accept_expr(stmt.expression)
+        if value is None:
+            return RUNTIME
 
         definition = self.scope.lookup(stmt.identifier)
         check_assignment(stmt.identifier, definition, value.type)
 
-        # update type of the definition
-        definition.value.type = value.type
-
         assert isinstance(definition, ComptimeDefinition)
 
-        definition.value.data = value.data
+        # replace instead of update the value, it can be shared with other definitions or the ast
+        definition.value = value
+        return NORMAL
 
-    def f_statement_if(self, stmt: ast.FStatementIf):
-        value = self.accept(stmt.condition)
+    def f_statement_if(self, stmt: ast.FStatementIf) -> Completion:
+        value = self.accept_expr(stmt.condition)
+        if value is None:
+            return RUNTIME
 
         if value.data:
-            self.accept(stmt.if_block)
+            return self.accept_with_child_scope(stmt.if_block)
         elif stmt.else_block is not None:
-            self.accept(stmt.else_block)
+            return self.accept_with_child_scope(stmt.else_block)
 
-    def f_statement_for(self, stmt: ast.FStatementFor):
-        raise CannotProcessAtComptime(stmt)
+        return NORMAL
+
+    def accept_range(self, call: ast.Call) -> Optional[list[ComptimeValue]]:
+        func = resolve_function(self.ctx.file, call.identifier)
+        assert isinstance(func, BuiltinFunction)
+
+        check_arguments(call, func)
+
+        args = self.accept_arguments(call)
+        if args is None:
+            return None
+
+        for arg, value, param in zip(call.arguments, args, func.parameters):
+            check_compatible(arg, value, param)
+
+        start, end = (it.data for it in args)
+        if not isinstance(start, int) or not isinstance(end, int):
+            return None
+
+        # check the budget before the range is materialized, it can be arbitrarily large
+        if not self.budget.consume_iterations(max(0, end - start)):
+            return None
+
+        return [ComptimeValue(it, types.NUMBER) for it in range(start, end)]
+
+    def accept_iterable(self, expr: ast.Expression) -> Optional[list[ComptimeValue]]:
+        """
+        Elements of the iterated list, consumes one iteration of the budget for every element. None if the list is only
+        known at runtime or the budget is exhausted.
+        """
+        # ranges are only materialized at compile time when they are iterated
+        if isinstance(expr, ast.ExpressionCall) and expr.call.identifier.name == 'range':
+            return self.accept_range(expr.call)
+
+        value = self.accept_expr(expr)
+        if value is None:
+            return None
+
+        check_compatible(expr, value, types.ANY_LIST)
+        assert isinstance(value.data, list)
+
+        if not self.budget.consume_iterations(len(value.data)):
+            return None
+
+        return [ComptimeValue.from_python(it) for it in value.data]
+
+    def f_statement_for(self, stmt: ast.FStatementFor) -> Completion:
+        items = self.accept_iterable(stmt.condition)
+        if items is None:
+            return RUNTIME
+
+        for item in items:
+            scope = self.scope.new_child_scope()
+            scope.insert_comptime(stmt.identifier, item, final=True)
+
+            completion = self.accept_with_scope(scope, stmt.block)
+            if completion is not NORMAL:
+                return completion
+
+        return NORMAL
+
+    def f_statement_fail(self, stmt: ast.FStatementFail) -> Completion:
+        value = self.accept_expr(stmt.expression)
+        if value is None:
+            return RUNTIME
 
-    def f_statement_fail(self, stmt: ast.FStatementFail):
-        value = self.accept(stmt.expression)
         check_compatible(stmt.expression, value, types.STRING)
+        fatal_problem('failure: ' + str(value.data), stmt)
+
+    def f_statement_expr(self, stmt: ast.FStatementExpr) -> Completion:
+        if self.accept_expr(stmt.expression) is None:
+            return RUNTIME
+
+        return NORMAL
+
+
+class AnalysisVisitorImpl(ComptimeVisitorImpl):
+    def __init__(self, ctx: Context, scope: Scope):
+        super().__init__(ctx, scope)
+        self.annotations: Annotations = {}
+
+    def accept_expr(self, expr: ast.Expression) -> Optional[ComptimeValue]:
+        value = getattr(self, expr.rule)(expr)
+        self.annotations[expr] = value
 
-        fatal_problem('failure: ' + value.data, stmt)
+        return value
 
-    def f_statement_expr(self, stmt: ast.FStatementExpr):
-        self.accept(stmt.expression)
+    def annotate(self, expr: ast.Expression, value: Optional[ComptimeValue]):
+        self.annotations[expr] = value
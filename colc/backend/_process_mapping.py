@@ -1,3 +1,5 @@
+from typing import Optional, Any, Hashable
+
 from colc.common import (
     fatal_problem,
     Value,
@@ -9,17 +11,25 @@ from colc.common import (
     NodeKind,
     comptime_data,
     comptime_list,
+    Type,
 )
 from colc.frontend import ast
 
 from ._context import Context
+from ._config import Optimization
+from ._peephole import optimize_peephole
+from ._dead_code import eliminate_dead_code
+from ._common_subexpression import eliminate_common_subexpressions
+from ._loop_invariant import hoist_loop_invariants
+from ._superinstruction import fuse_superinstructions
 from ._instruction import Label, Instruction, InstructionBuffer
 from ._opcode import Opcode
-from ._scope import VisitorWithScope, RuntimeDefinition, scopes
-from ._process_expression import process_expression
+from ._scope import VisitorWithScope, RuntimeDefinition, Scope, scopes
+from ._process_expression import analyze_expression, Annotations
 from ._functions import operator_binary_infer, operator_unary_infer, resolve_function, BuiltinFunction, DefinedFunction
-from ._utils import Allocator, check_arguments, check_assignment, check_compatible
+from ._utils import Allocator, check_arguments, check_assignment, check_compatible, typed_key
 from ._mapping import Mapping
+from ._subroutine import Specialization
 from ._fixpoint import fixpoint_can_convert, fixpoint_from_float
 
 
@@ -30,14 +40,7 @@ def process_mappings(ctx: Context) -> list[Mapping]:
     if all(len(it.labels) > 0 for it in mappings):
         fatal_problem('no unconditional mapping')
 
-    return [
-        Mapping(
-            name=mapping.identifier.name,
-            labels=[_lookup_label(ctx, it) for it in mapping.labels],
-            code=process_mapping(ctx, mapping),
-        )
-        for mapping in mappings
-    ]
+    return [process_mapping(ctx, mapping) for mapping in mappings]
 
 
 def _lookup_label(ctx: Context, identifier: ast.Identifier) -> int:
@@ -48,22 +51,111 @@ def _lookup_label(ctx: Context, identifier: ast.Identifier) -> int:
     return label
 
 
-def process_mapping(ctx: Context, mapping: ast.MDefinition) -> bytes:
+def _optimize(ctx: Context, buffer: InstructionBuffer, allocator: Allocator):
+    if ctx.config.enabled(Optimization.DEAD_CODE):
+        eliminate_dead_code(buffer, ctx.statistics)
+    if ctx.config.enabled(Optimization.LOOP_INVARIANT):
+        hoist_loop_invariants(buffer, allocator, ctx.statistics)
+    if ctx.config.enabled(Optimization.COMMON_SUBEXPRESSION):
+        eliminate_common_subexpressions(buffer, allocator, ctx.statistics)
+    if ctx.config.enabled(Optimization.PEEPHOLE):
+        optimize_peephole(buffer, ctx.statistics)
+
+        # rewritten jumps and branches leave unreachable code behind, e.g. a RET after a jump that became a RET
+        if ctx.config.enabled(Optimization.DEAD_CODE):
+            eliminate_dead_code(buffer, ctx.statistics)
+            optimize_peephole(buffer, ctx.statistics)
+    if ctx.config.enabled(Optimization.SUPERINSTRUCTION):
+        fuse_superinstructions(buffer, ctx.statistics)
+
+
+def process_mapping(ctx: Context, mapping: ast.MDefinition) -> Mapping:
     visitor = VisitorImpl(ctx)
     visitor.accept(mapping.block)
     visitor.finalize()
 
-    return visitor.buffer.build()
+    _optimize(ctx, visitor.buffer, visitor.allocator)
+
+    return Mapping(
+        name=mapping.identifier.name,
+        labels=[_lookup_label(ctx, it) for it in mapping.labels],
+        code=visitor.buffer.build(),
+        slots=visitor.allocator.count,
+    )
+
+
+def process_specialization(
+    ctx: Context,
+    specialization: Specialization,
+    func: DefinedFunction,
+    arguments: list[Value],
+    inlined: list[ast.FDefinition],
+):
+    """
+    Compiles the body of the function into the specialization. Comptime arguments are part of the code, runtime
+    arguments are stored in the first slots by CALL.
+    """
+    visitor = VisitorImpl(ctx, inlined)
+
+    sctx, scope = visitor.scope.new_call_scope(specialization.name)
+    for param, value in zip(func.definition.parameters, arguments):
+        if isinstance(value, ComptimeValue):
+            scope.insert_comptime(param, value, final=True)
+        else:
+            scope.insert_runtime(param, value, visitor.allocator.alloc(), final=True)
+
+    returns = visitor.accept_function_block(sctx, scope, func.definition.block)
+    visitor.buffer.add(Instruction(Opcode.RET))
+
+    specialization.returns = returns
+    specialization.cost = len(visitor.buffer.instructions)
+    specialization.body = visitor.buffer.items()
+    specialization.body_slots = visitor.allocator.count
+
+    # recursive calls already added the specialization to the subroutine table
+    if specialization.index is not None:
+        build_subroutine(ctx, specialization)
+
+
+def build_subroutine(ctx: Context, specialization: Specialization):
+    """
+    Optimizes the body of a specialization that is called as subroutine and builds its code.
+    """
+    buffer = InstructionBuffer()
+    buffer.replace(specialization.body)
+    allocator = Allocator(specialization.body_slots)
+
+    _optimize(ctx, buffer, allocator)
+
+    specialization.code = buffer.build()
+    specialization.slots = allocator.count
+
+
+# instructions with a local slot as argument
+_slot_operations = frozenset({Opcode.LOAD, Opcode.STORE, Opcode.NEXT, Opcode.HAS_NEXT, Opcode.RESET})
+
+
+def _argument_key(value: Value) -> Hashable:
+    if isinstance(value, ComptimeValue):
+        return value.type, typed_key(value.data)
+    else:
+        return (value.type,)
 
 
 class VisitorImpl(VisitorWithScope):
-    def __init__(self, ctx: Context):
+    def __init__(self, ctx: Context, inlined: Optional[list[ast.FDefinition]] = None):
         super().__init__()
         self.ctx = ctx
         self.allocator = Allocator()
         self.buffer = InstructionBuffer()
+        self.annotations: Annotations = {}
 
-        self.scope.insert_synthetic('root', types.NODE, self.allocator.alloc())
+        # functions currently inlined or compiled as subroutine, innermost last
+        self.inlined: list[ast.FDefinition] = inlined or []
+
+        # only mappings have access to the root node, subroutines only to their parameters
+        if len(self.inlined) == 0:
+            self.scope.insert_synthetic('root', types.NODE, self.allocator.alloc())
 
     def finalize(self):
         sctx = self.scope.find(scopes.Root)
@@ -71,6 +163,15 @@ class VisitorImpl(VisitorWithScope):
 
         self.buffer.add_label(sctx.end)
 
+    def accept_with_scope(self, scope: Scope, node: Optional[ast.Node]) -> Any:
+        result = super().accept_with_scope(scope, node)
+
+        # definitions of the scope cannot be accessed anymore, their slots can be reused
+        for definition in scope.runtime_definitions():
+            self.allocator.free(definition.index)
+
+        return result
+
     def instruction_for_data(self, value: comptime_data):
         if value is True:
             instruction = Instruction(Opcode.TRUE)
@@ -93,6 +194,11 @@ class VisitorImpl(VisitorWithScope):
         self.buffer.add(instruction)
 
     def instruction_for_list(self, value: comptime_list):
+        # a constant list is loaded from the const pool, instead of being built on every execution
+        if len(value) > 0 and self.ctx.config.enabled(Optimization.CONST_LIST):
+            self.buffer.add(Instruction(Opcode.LIST_CONST, self.ctx.intern_const(value)))
+            return
+
         self.buffer.add(Instruction(Opcode.LIST))
 
         for element in reversed(value):
@@ -106,15 +212,24 @@ class VisitorImpl(VisitorWithScope):
             self.instruction_for_data(value.data)
 
     def accept_expr(self, expr: ast.Expression, load: bool = True) -> Value:
-        # this is backtracking search, not very fast but works great
-        value = process_expression(self.ctx, self.scope, expr)
+        # inlined function bodies analyze their own expressions, restore the annotations of the outer expression
+        annotations = self.annotations
+
+        self.annotations = analyze_expression(self.ctx, self.scope, expr)
+        value = self.emit_expr(expr, load)
+        self.annotations = annotations
+
+        return value
 
-        # if value could not be determined at compile time, generate instructions
+    def emit_expr(self, expr: ast.Expression, load: bool = True) -> Value:
+        value: Value | None = self.annotations[expr]
+
+        # if value could not be determined at compile time, generate instructions, dispatch directly to save a frame
         if value is None:
-            value = self.accept(expr)
+            value = getattr(self, expr.rule)(expr)
 
         # if value was determined at compile time, load value onto stack
-        if load and value.is_comptime:
+        if load and isinstance(value, ComptimeValue):
             self.instruction_for_const(value)
 
         return value
@@ -147,12 +262,12 @@ class VisitorImpl(VisitorWithScope):
         definition = self.scope.lookup(stmt.identifier)
         check_assignment(stmt.identifier, definition, value.type)
 
-        # update type of the definition
-        definition.value.type = value.type
-
         # it is only possible to assign to runtime definitions, comptime should always be final in this case
         assert isinstance(definition, RuntimeDefinition)
 
+        # replace instead of update the value, it can be shared with other definitions
+        definition.value = RuntimeValue(value.type)
+
         self.buffer.add(Instruction.new_store(definition.index))
         return False
 
@@ -233,6 +348,8 @@ class VisitorImpl(VisitorWithScope):
         self.buffer.add(Instruction.new_jmp(Opcode.JMP_B, sctx.start))
         self.buffer.add_label(sctx.end)
 
+        self.allocator.free(list_index)
+
         return False
 
     def f_statement_fail(self, stmt: ast.FStatementFail) -> bool:
@@ -250,17 +367,24 @@ class VisitorImpl(VisitorWithScope):
         return False
 
     def expression_unary(self, expr: ast.ExpressionUnary) -> Value:
-        value = self.accept_expr(expr.expression)
+        value = self.emit_expr(expr.expression)
         self.buffer.add(Instruction.new_unary_operator(expr.operator))
         return operator_unary_infer(expr.operator, value)
 
     def expression_binary(self, expr: ast.ExpressionBinary) -> Value:
-        left = self.accept_expr(expr.left)
-        right = self.accept_expr(expr.right)
+        # right nested chains, e.g. lowered list literals, are emitted iteratively to keep the recursion depth constant
+        chain = [expr]
+        while isinstance(chain[-1].right, ast.ExpressionBinary) and self.annotations[chain[-1].right] is None:
+            chain.append(chain[-1].right)
 
-        self.buffer.add(Instruction.new_binary_operator(expr.operator))
+        lefts = [self.emit_expr(it.left) for it in chain]
+        right = self.emit_expr(chain[-1].right)
 
-        return operator_binary_infer(expr.operator, left, right)
+        for node, left in zip(reversed(chain), reversed(lefts)):
+            self.buffer.add(Instruction.new_binary_operator(node.operator))
+            right = operator_binary_infer(node.operator, left, right)
+
+        return right
 
     def expression_literal(self, expr: ast.ExpressionLiteral) -> Value:
         return expr.value
@@ -289,26 +413,14 @@ class VisitorImpl(VisitorWithScope):
         check_arguments(call, func)
 
         for arg, param in zip(call.arguments, func.parameters):
-            value = self.accept_expr(arg)
+            value = self.emit_expr(arg)
             check_compatible(arg, value, param)
 
         self.buffer.add(Instruction(func.opcode))
         return RuntimeValue(func.returns)
 
-    def accept_defined_function(self, call: ast.Call, func: DefinedFunction) -> Value:
-        check_arguments(call, func)
-
-        sctx, scope = self.scope.new_call_scope(call.identifier.name)
-        for arg, param in zip(call.arguments, func.definition.parameters):
-            value = self.accept_expr(arg, load=False)
-
-            if isinstance(value, ComptimeValue):
-                scope.insert_comptime(param, value, final=True)
-            else:
-                definition = scope.insert_runtime(param, value, self.allocator.alloc(), final=True)
-                self.buffer.add(Instruction.new_store(definition.index))
-
-        returns = self.accept_with_scope(scope, func.definition.block)
+    def accept_function_block(self, sctx: scopes.Function, scope: Scope, block: ast.FBlock) -> Type:
+        returns = self.accept_with_scope(scope, block)
 
         # if there is no explicit return from the function, insert implicit none
         if not returns:
@@ -316,7 +428,94 @@ class VisitorImpl(VisitorWithScope):
             sctx.add_return(types.NONE)
 
         self.buffer.add_label(sctx.end)
-        return RuntimeValue(sctx.get_return())
+        return sctx.get_return()
+
+    def specialize(self, call: ast.Call, func: DefinedFunction, arguments: list[Value]) -> Specialization:
+        key = (func.definition, tuple(_argument_key(it) for it in arguments))
+
+        specialization = self.ctx.lookup_specialization(key)
+        if specialization is not None:
+            return specialization
+
+        parameters = sum(1 for it in arguments if not isinstance(it, ComptimeValue))
+        specialization = Specialization(call.identifier.name, parameters)
+
+        # store before the body is compiled, recursive calls use the same specialization
+        self.ctx.store_specialization(key, specialization)
+        process_specialization(self.ctx, specialization, func, arguments, [*self.inlined, func.definition])
+
+        return specialization
+
+    def accept_defined_function(self, call: ast.Call, func: DefinedFunction) -> Value:
+        check_arguments(call, func)
+
+        # recursive calls pass all arguments at runtime, otherwise every level could create a new specialization
+        recursive = func.definition in self.inlined
+
+        if len(self.inlined) >= self.ctx.config.inline_depth:
+            fatal_problem('maximum inlining depth exceeded', call.identifier)
+
+        arguments = [self.emit_expr(arg, load=recursive) for arg in call.arguments]
+        if recursive:
+            arguments = [it.as_runtime for it in arguments]
+
+        specialization = self.specialize(call, func, arguments)
+
+        if recursive or specialization.cost > self.ctx.config.inline_cost:
+            self.ctx.statistics['subroutine call'] += 1
+            self.buffer.add(Instruction(Opcode.CALL, self.call_specialization(specialization)))
+
+            # the return type is not known while the body of the subroutine is compiled
+            if specialization.returns is None:
+                return AnyValue
+
+            return RuntimeValue(specialization.returns)
+
+        self.ctx.statistics['inlined call'] += 1
+        return self.inline_specialization(specialization)
+
+    def call_specialization(self, specialization: Specialization) -> int:
+        built = specialization.index is not None
+        index = self.ctx.intern_subroutine(specialization)
+
+        # the code of a specialization that is still compiled is built once its body is complete
+        if not built and specialization.returns is not None:
+            build_subroutine(self.ctx, specialization)
+
+        return index
+
+    def inline_specialization(self, specialization: Specialization) -> Value:
+        """
+        Copies the already compiled body of the specialization into the current buffer. The slots of the body are
+        mapped to new local slots, every copy gets new labels.
+        """
+        assert specialization.returns is not None
+
+        slots = [self.allocator.alloc() for _ in range(specialization.body_slots)]
+        labels: dict[Label, Label] = {}
+
+        def relabel(label: Label) -> Label:
+            return labels.setdefault(label, Label(label.name))
+
+        # runtime arguments are on the stack, the last one on top
+        for index in reversed(range(specialization.parameters)):
+            self.buffer.add(Instruction.new_store(slots[index]))
+
+        # the body ends with the only RET, returns jump to the end of the body
+        for item in specialization.body[:-1]:
+            if isinstance(item, Label):
+                self.buffer.add_label(relabel(item))
+            elif item.opcode in _slot_operations:
+                self.buffer.add(Instruction(item.opcode, slots[item.argument_value]))
+            elif item.opcode.is_jmp:
+                self.buffer.add(Instruction.new_jmp(item.opcode, relabel(item.argument_label)))
+            else:
+                self.buffer.add(Instruction(item.opcode, item.argument))
+
+        for slot in slots:
+            self.allocator.free(slot)
+
+        return RuntimeValue(specialization.returns)
 
     def expression_call(self, expr: ast.ExpressionCall) -> Value:
         func = resolve_function(self.ctx.file, expr.call.identifier)
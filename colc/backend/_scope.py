@@ -2,13 +2,13 @@ import dataclasses
 import abc
 from typing import Optional, Any, Tuple, TypeVar
 
-from colc.common import fatal_problem, internal_problem, Value, RuntimeValue, ComptimeValue, Type, first
+from colc.common import fatal_problem, internal_problem, Value, RuntimeValue, ComptimeValue, Type
 from colc.frontend import ast, Visitor
 
 from . import _scope_context as scopes
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Definition(abc.ABC):
     name: str
     final: bool
@@ -23,7 +23,7 @@ class Definition(abc.ABC):
         return not self.is_comptime
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class RuntimeDefinition(Definition):
     value: RuntimeValue
     index: int
@@ -33,7 +33,7 @@ class RuntimeDefinition(Definition):
         return False
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class ComptimeDefinition(Definition):
     value: ComptimeValue
 
@@ -48,14 +48,16 @@ C = TypeVar('C', bound=scopes.Context)
 class Scope:
     def __init__(self, parent: Optional['Scope'], ctx: Optional[scopes.Context]):
         self._parent = parent
-        self._definitions: list[Definition] = []
+        self._definitions: dict[str, Definition] = {}
+        self._resolved: dict[str, Definition] = {}
         self._context = ctx
 
     def _insert(self, identifier: ast.Identifier, definition: Definition):
-        if any(it for it in self._definitions if it.name == identifier.name):
+        if identifier.name in self._definitions:
             fatal_problem('identifier is already defined', identifier)
 
-        self._definitions.append(definition)
+        self._definitions[identifier.name] = definition
+        self._resolved.pop(identifier.name, None)
 
     def insert_comptime(self, identifier: ast.Identifier, value: ComptimeValue, final: bool) -> ComptimeDefinition:
         definition = ComptimeDefinition(identifier.name, final, value)
@@ -72,17 +74,43 @@ class Scope:
     def insert_synthetic(self, name: str, type: Type, index: int) -> RuntimeDefinition:
         definition = RuntimeDefinition(name, True, RuntimeValue(type), index)
 
-        if any(it for it in self._definitions if it.name == name):
+        if name in self._definitions:
             internal_problem(f'identifier is already defined {name}')
-        self._definitions.append(definition)
+        self._definitions[name] = definition
+        self._resolved.pop(name, None)
 
         return definition
 
-    def lookup(self, identifier: ast.Identifier, expected: Optional[Type] = None) -> Definition:
-        definition = first(it for it in self._definitions if it.name == identifier.name)
+    def runtime_definitions(self) -> list[RuntimeDefinition]:
+        """
+        Runtime definitions of this scope, definitions of parent scopes are not included.
+        """
+        return [it for it in self._definitions.values() if isinstance(it, RuntimeDefinition)]
+
+    def resolve(self, name: str) -> Optional[Definition]:
+        """
+        Finds the definition for name in this scope or the closest parent scope. The result is memoized per scope, an
+        insert into this scope invalidates the entry for the inserted name.
+        """
+        definition = self._resolved.get(name)
+        if definition is not None:
+            return definition
+
+        scope: Optional[Scope] = self
+
+        while scope is not None:
+            definition = scope._definitions.get(name)
+
+            if definition is not None:
+                self._resolved[name] = definition
+                return definition
 
-        if definition is None and self._parent is not None:
-            definition = self._parent.lookup(identifier)
+            scope = scope._parent
+
+        return None
+
+    def lookup(self, identifier: ast.Identifier, expected: Optional[Type] = None) -> Definition:
+        definition = self.resolve(identifier.name)
         if definition is None:
             fatal_problem('undefined identifier', identifier)
 
@@ -0,0 +1,50 @@
+import dataclasses
+from typing import Optional
+
+from colc.common import Type
+
+from ._instruction import Item
+
+
+@dataclasses.dataclass
+class Subroutine:
+    name: str
+
+    # number of arguments, the caller pushes them in order and CALL stores them in the first slots of a new frame
+    parameters: int
+
+    code: bytes
+
+    # number of local slots including the parameters
+    slots: int
+
+
+@dataclasses.dataclass(slots=True)
+class Specialization:
+    """
+    A defined function compiled for one set of arguments. Comptime arguments are part of the code, runtime arguments
+    are parameters of the subroutine.
+    """
+
+    name: str
+    parameters: int
+
+    # return type, None while the body is compiled
+    returns: Optional[Type] = None
+
+    # number of instructions of the body
+    cost: int = 0
+
+    # body before any optimization, parameters in the first slots and returns as RET at the end
+    body: list[Item] = dataclasses.field(default_factory=list)
+    body_slots: int = 0
+
+    # optimized body, only built once the specialization is called as subroutine
+    code: bytes = b''
+    slots: int = 0
+
+    # index in the subroutine table, None as long as every call site is inlined
+    index: Optional[int] = None
+
+    def to_subroutine(self) -> Subroutine:
+        return Subroutine(name=self.name, parameters=self.parameters, code=self.code, slots=self.slots)
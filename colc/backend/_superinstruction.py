@@ -0,0 +1,68 @@
+import collections
+from typing import Callable, Optional
+
+from ._instruction import Instruction, InstructionBuffer, Item
+from ._opcode import Opcode
+
+
+def _fuse_tee(first: Instruction, second: Instruction) -> Optional[Instruction]:
+    if first.opcode == Opcode.STORE and second.opcode == Opcode.LOAD and first.argument == second.argument:
+        return Instruction(Opcode.TEE, first.argument)
+
+    return None
+
+
+def _fuse_int(first: Instruction, second: Instruction) -> Optional[Instruction]:
+    if first.opcode != Opcode.INT:
+        return None
+
+    if second.opcode == Opcode.ADD:
+        return Instruction(Opcode.ADD_INT, first.argument)
+    if second.opcode == Opcode.SUB:
+        return Instruction(Opcode.SUB_INT, first.argument)
+
+    return None
+
+
+def _fuse_branch(first: Instruction, second: Instruction) -> Optional[Instruction]:
+    if first.opcode == Opcode.EQL and second.opcode == Opcode.JMP_FF:
+        return Instruction.new_jmp(Opcode.JMP_FNE, second.argument_label)
+
+    return None
+
+
+# pairs of frequent instructions that are replaced by one instruction, only pairs with at most one argument fit
+_rules: dict[str, Callable[[Instruction, Instruction], Optional[Instruction]]] = {
+    'superinstruction tee': _fuse_tee,
+    'superinstruction int': _fuse_int,
+    'superinstruction branch': _fuse_branch,
+}
+
+
+def fuse_superinstructions(buffer: InstructionBuffer, statistics: collections.Counter[str]):
+    """
+    Replaces pairs of instructions by one superinstruction, which saves one dispatch at runtime. A pair is only fused if
+    no label points at the second instruction. Has to run last, the other optimizations do not know superinstructions.
+    Counts the fused pairs in statistics.
+    """
+    items = buffer.items()
+    result: list[Item] = []
+
+    for item in items:
+        last = result[-1] if len(result) > 0 else None
+
+        if not isinstance(item, Instruction) or not isinstance(last, Instruction):
+            result.append(item)
+            continue
+
+        for name, rule in _rules.items():
+            fused = rule(last, item)
+
+            if fused is not None:
+                result[-1] = fused
+                statistics[name] += 1
+                break
+        else:
+            result.append(item)
+
+    buffer.replace(result)
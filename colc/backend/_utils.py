@@ -1,4 +1,5 @@
-from typing import TypeVar, Generic, Optional
+import heapq
+from typing import TypeVar, Generic, Optional, Hashable
 
 from colc.common import fatal_problem, Type, Value
 from colc.frontend import ast
@@ -10,33 +11,72 @@ T = TypeVar('T')
 
 
 class Allocator:
-    def __init__(self):
-        self.index: int = 0
+    """
+    Allocates local slots. Freed slots are reused, the lowest free slot first.
+    """
+
+    def __init__(self, count: int = 0):
+        # the first count slots are already in use
+        self.index: int = count
+        self.released: list[int] = []
+
+    @property
+    def count(self) -> int:
+        """
+        Maximum number of slots in use at the same time.
+        """
+        return self.index
 
     def alloc(self) -> int:
+        if len(self.released) > 0:
+            return heapq.heappop(self.released)
+
+        self.index += 1
+        return self.index - 1
+
+    def alloc_unused(self) -> int:
+        """
+        Allocates a slot that was never used before, freed slots are not considered.
+        """
         self.index += 1
         return self.index - 1
 
+    def free(self, index: int):
+        heapq.heappush(self.released, index)
+
+
+def typed_key(value: object) -> Hashable:
+    """
+    Type aware key for comptime data, such that values which are only equal under == (1, 1.0, True or a string and a
+    node kind with the same text) are never merged.
+    """
+    if isinstance(value, (list, tuple)):
+        return type(value), tuple(typed_key(it) for it in value)
+
+    return type(value), value
+
 
 class Pool(Generic[T]):
     def __init__(self):
         self._items: list[T] = []
+        self._indices: dict[Hashable, int] = {}
 
     def __iter__(self):
         return self._items.__iter__()
 
     def intern(self, value: T) -> int:
-        if value in self._items:
-            return self._items.index(value)
-        else:
+        key = typed_key(value)
+
+        index = self._indices.get(key)
+        if index is None:
+            index = len(self._items)
             self._items.append(value)
-            return len(self._items) - 1
+            self._indices[key] = index
+
+        return index
 
     def lookup(self, value: T) -> Optional[int]:
-        if value in self._items:
-            return self._items.index(value)
-        else:
-            return None
+        return self._indices.get(typed_key(value))
 
 
 def check_arguments(call: ast.Call, func: Function):
@@ -22,12 +22,10 @@ class FatalProblem(Exception):
         self.locations = locations
 
     def _render_location(self, sb: StringBuilder, range: Location):
-        text = range.file.text
-
         start = range.start_position
         end = range.end_position
 
-        line = text.splitlines()[start.line]
+        line = range.file.line_text(start.line)
 
         # the range covers multiple lines
         if start.line != end.line:
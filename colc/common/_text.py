@@ -1,4 +1,6 @@
+import bisect
 import dataclasses
+import functools
 import pathlib
 
 import lark
@@ -19,49 +21,63 @@ class TextFile:
             end=token.end_pos,
         )
 
+    @functools.cached_property
+    def _line_starts(self) -> list[int]:
+        """
+        Offsets of the first character of every line, built on first use.
+        """
+        starts = [0]
+
+        index = self.text.find('\n')
+        while index >= 0:
+            starts.append(index + 1)
+            index = self.text.find('\n', index + 1)
+
+        return starts
+
     def location_from_position(self, line: int, column: int) -> 'Location':
-        for i, c in enumerate(self.text):
-            if c == '\n':
-                line -= 1
+        assert 0 <= line < len(self._line_starts)
 
-            if line <= 0:
-                return Location(self, i + column, i + column)
+        offset = self._line_starts[line] + column
+        return Location(self, offset, offset)
 
-        assert False
+    def position_from_offset(self, offset: int) -> 'Position':
+        assert 0 <= offset <= len(self.text)
 
+        line = bisect.bisect_right(self._line_starts, offset) - 1
+        return Position(line, offset - self._line_starts[line])
 
-@dataclasses.dataclass
+    def line_text(self, line: int) -> str:
+        """
+        Returns the content of the line without the line break.
+        """
+        start = self._line_starts[line]
+
+        if line + 1 < len(self._line_starts):
+            end = self._line_starts[line + 1] - 1
+        else:
+            end = len(self.text)
+
+        return self.text[start:end].rstrip('\r')
+
+
+@dataclasses.dataclass(slots=True)
 class Position:
     line: int
     column: int
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Location:
     file: TextFile
 
     start: int
     end: int
 
-    def _position_for(self, offset: int):
-        assert len(self.file.text) >= offset
-
-        line = 0
-        column = 0
-
-        for c in self.file.text[0:offset]:
-            if c == '\n':
-                line += 1
-                column = 0
-            else:
-                column += 1
-
-        return Position(line, column)
-
     @property
     def start_position(self) -> Position:
-        return self._position_for(self.start)
+        return self.file.position_from_offset(self.start)
 
     @property
     def end_position(self) -> Position:
-        return self._position_for(self.end)
+        return self.file.position_from_offset(self.end)
@@ -1,12 +1,12 @@
 import enum
+import functools
 
 from types import UnionType
-from typing import Iterable, Optional, get_args, get_origin
+from typing import ClassVar, Iterable, Optional, get_args, get_origin
 
 from colc.common import first
 
 from .._internal import internal_problem
-from .._utils import flatten
 
 
 class Node: ...
@@ -48,28 +48,72 @@ class PrimitiveType(enum.StrEnum):
         internal_problem(f'invalid type {py_type}')
 
 
+# bit of every primitive type in the mask of a type
+_bits: dict[PrimitiveType, int] = {it: 1 << i for i, it in enumerate(PrimitiveType)}
+_all_bits = (1 << len(PrimitiveType)) - 1
+
+# primitive types sorted by name, used for stable representations
+_sorted = sorted(PrimitiveType)
+
+
 class Type:
-    values: set[PrimitiveType]
+    """
+    Types are interned (mask, is_list) pairs. Every primitive type is one bit in the mask, therefore all operations on
+    types are integer operations and two types are equal if and only if they are the same object.
+    """
+
+    __slots__ = ('mask', 'is_list')
+
+    mask: int
     is_list: bool
 
-    def __init__(self, values: set[PrimitiveType], list: bool = False):
-        self.values = values
-        self.is_list = list
+    _interned: ClassVar[dict[tuple[int, bool], 'Type']] = {}
+
+    def __new__(cls, values: Iterable[PrimitiveType], list: bool = False) -> 'Type':
+        mask = 0
+        for it in values:
+            mask |= _bits[it]
+
+        return cls.from_mask(mask, list)
+
+    @classmethod
+    def from_mask(cls, mask: int, list: bool = False) -> 'Type':
+        key = (mask, list)
+
+        type = cls._interned.get(key)
+        if type is None:
+            type = object.__new__(cls)
+            type.mask = mask
+            type.is_list = list
+
+            cls._interned[key] = type
+
+        return type
+
+    def __reduce__(self):
+        return Type.from_mask, (self.mask, self.is_list)
 
     @staticmethod
     def lup(types: Iterable['Type']) -> 'Type':
         """
         Creates the least upper bound of multiple types.
         """
+        mask = 0
+        is_list = False
 
         # TODO: this using list as upper bound for single values is not fully supported
-        return Type(
-            values=set(flatten(map(lambda it: it.values, types))),
-            list=any(map(lambda it: it.is_list, types)),
-        )
+        for it in types:
+            mask |= it.mask
+            is_list |= it.is_list
+
+        return Type.from_mask(mask, is_list)
 
     @staticmethod
     def from_python(py_type) -> 'Type':
+        return _type_from_python(py_type)
+
+    @staticmethod
+    def _from_python(py_type) -> 'Type':
         if get_origin(py_type) is list:
             py_type = first(get_args(py_type))
             is_list = True
@@ -83,27 +127,28 @@ class Type:
 
         return Type(types, list=is_list)
 
+    @property
+    def values(self) -> frozenset[PrimitiveType]:
+        return frozenset(it for it in PrimitiveType if self.mask & _bits[it])
+
     @property
     def is_any(self) -> bool:
-        return len(self.values) == len(PrimitiveType)
+        return self.mask == _all_bits
 
     @property
     def is_void(self) -> bool:
-        return len(self.values) == 0
+        return self.mask == 0
 
     @property
     def as_scalar(self) -> 'Type':
-        return Type(self.values, list=False)
+        return Type.from_mask(self.mask, False)
 
     @property
     def as_list(self) -> 'Type':
-        return Type(self.values, list=True)
+        return Type.from_mask(self.mask, True)
 
     def compatible(self, other: 'Type') -> bool:
-        if self.is_list != other.is_list:
-            return False
-
-        return len(self.values & other.values) > 0
+        return self.is_list == other.is_list and self.mask & other.mask != 0
 
     def __repr__(self):
         if self.is_any:
@@ -111,21 +156,13 @@ class Type:
         elif self.is_void:
             type = 'void'
         else:
-            # sort for testing
-            sorted = list(self.values)
-            sorted.sort()
-
-            type = ' | '.join(sorted)
+            type = ' | '.join(it for it in _sorted if self.mask & _bits[it])
 
         if self.is_list:
             return '<list %s>' % type
         else:
             return '<%s>' % type
 
-    def __eq__(self, other) -> bool:
-        if not isinstance(other, Type):
-            return False
-        if self.is_list != other.is_list:
-            return False
 
-        return self.values == other.values
+# types are never modified, therefore all values of the same python type share one instance
+_type_from_python = functools.cache(Type._from_python)
@@ -5,6 +5,8 @@ from . import _types as types
 
 
 class Value(abc.ABC):
+    __slots__ = ('type',)
+
     type: Type
 
     @property
@@ -24,6 +26,8 @@ class Value(abc.ABC):
 
 
 class RuntimeValue(Value):
+    __slots__ = ()
+
     def __init__(self, type: Type):
         self.type = type
 
@@ -37,6 +41,8 @@ class RuntimeValue(Value):
 
 
 class ComptimeValue(Value):
+    __slots__ = ('data',)
+
     data: comptime
 
     def __init__(self, data: comptime, type: Type):
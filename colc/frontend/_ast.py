@@ -1,43 +1,69 @@
-import typeguard
-from typing import Optional
+import os
+from typing import Optional, ClassVar, get_origin
 
 from colc.common import Location, to_snake_case, ComptimeValue
 
 from ._enums import Quantifier, Operator, Comparison, Aggregator, Qualifier
 
+# runtime type validation of all fields, only intended for debugging
+_type_checks = os.environ.get('COLC_CHECK_AST', '') not in ('', '0')
+
+
+def enable_type_checks(enabled: bool = True):
+    global _type_checks
+    _type_checks = enabled
+
+
+class _NodeType(type):
+    """
+    Derives the slots of a node class from its field annotations, nodes are the most common objects of the compiler.
+    """
+
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        annotations = namespace.get('__annotations__', {})
+        namespace['__slots__'] = tuple(k for k, v in annotations.items() if get_origin(v) is not ClassVar)
+
+        return super().__new__(mcs, name, bases, namespace, **kwargs)
+
+
+class Node(metaclass=_NodeType):
+    rule: ClassVar[str]
+    fields: ClassVar[dict[str, type]]
 
-class Node:
-    rule: str
     location: Location
 
-    @classmethod
-    def _collect_annotations(cls) -> dict[str, type]:
-        annotations: dict[str, type] = {}
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        cls.rule = to_snake_case(cls.__name__)
+
+        cls.fields = {}
         for c in cls.__mro__:
             if c != Node:
-                annotations.update(getattr(c, '__annotations__', {}))
+                cls.fields.update(getattr(c, '__annotations__', {}))
+
+    def __init__(self, **kwargs):
+        for name in self.fields:
+            setattr(self, name, kwargs.get(name, None))
 
-        return annotations
+        self.location = kwargs['location']
 
-    def __new__(cls, **kwargs):
-        obj = object.__new__(cls)
-        obj.rule = to_snake_case(cls.__name__)
+        if _type_checks:
+            self._check_types()
 
-        return obj
+    def _check_types(self):
+        import typeguard
 
-    def __init__(self, **kwargs):
-        for name, t in self._collect_annotations().items():
-            value = kwargs.get(name, None)
+        for name, t in self.fields.items():
+            value = getattr(self, name)
 
             try:
-                setattr(self, name, typeguard.check_type(value, t))
+                typeguard.check_type(value, t)
             except typeguard.TypeCheckError:
                 raise TypeError(f'Filed {name} is of type {t}, but got: {value}')
 
-        self.location = kwargs['location']
-
     def __repr__(self):
-        attrs = ', '.join(f'{k}={getattr(self, k)!r}' for k in list(self._collect_annotations()))
+        attrs = ', '.join(f'{k}={getattr(self, k)!r}' for k in self.fields)
         return f'{self.__class__.__name__}[{self.location.start}:{self.location.end}]({attrs})'
 
 
@@ -1,3 +1,11 @@
+import contextvars
+import functools
+import hashlib
+import os
+import pathlib
+import sys
+from typing import Optional, cast
+
 import lark
 
 from colc.common import TextFile, Location, fatal_problem, internal_problem, ComptimeValue, NodeKind
@@ -6,18 +14,53 @@ from . import _ast as ast
 from ._enums import Quantifier, Comparison, Aggregator, Operator, Qualifier
 
 
-@lark.v_args(meta=True)
-class Transformer(lark.Transformer):
+class AstBuilder:
+    """
+    Creates the ast nodes for the rules of the grammar. Every rule method receives the location of the rule and the list
+    of all children, since the grammar is parsed with keep_all_tokens.
+    """
+
     def __init__(self, file: TextFile):
         self.file = file
 
+        # locations of nodes that do not cover all tokens of their rule, like groups
+        self._containers: dict[ast.Node, Location] = {}
+
     def location_from_meta(self, meta: lark.tree.Meta) -> Location:
+        # only the start rule can be empty
+        if meta.empty:
+            return Location(file=self.file, start=0, end=0)
+
         return Location(
             file=self.file,
             start=meta.start_pos,
             end=meta.end_pos,
         )
 
+    def _start_of(self, child) -> int:
+        if isinstance(child, lark.Token):
+            assert child.start_pos is not None
+            return child.start_pos
+
+        return self._containers.get(child, child.location).start
+
+    def _end_of(self, child) -> int:
+        if isinstance(child, lark.Token):
+            assert child.end_pos is not None
+            return child.end_pos
+
+        return self._containers.get(child, child.location).end
+
+    def location_from_children(self, children: list) -> Location:
+        """
+        Same as lark's propagate_positions, a rule starts at its first child and ends at its last child.
+        """
+        return Location(
+            file=self.file,
+            start=next((self._start_of(it) for it in children if it is not None), 0),
+            end=next((self._end_of(it) for it in reversed(children) if it is not None), 0),
+        )
+
     def identifier_from_token(self, token: lark.Token) -> ast.Identifier:
         assert token.type in ['IDENTIFIER', 'MAIN']
 
@@ -49,262 +92,262 @@ class Transformer(lark.Transformer):
     def start(self, _, children):
         return children
 
-    def include(self, meta, children):
+    def include(self, location, children):
         return ast.Include(
-            location=self.location_from_meta(meta),
+            location=location,
             path=self.string_from_token(children[1]),
         )
 
-    def c_definition_type(self, meta, children):
+    def c_definition_type(self, location, children):
         return ast.CDefinitionType(
-            location=self.location_from_meta(meta),
+            location=location,
             identifier=self.identifier_from_token(children[1]),
             kind=self.kind_from_token(children[3]),
             parameters=self.parameter_from_children(children),
             block=children[-1],
         )
 
-    def c_definition_main(self, meta, children):
+    def c_definition_main(self, location, children):
         return ast.CDefinitionMain(
-            location=self.location_from_meta(meta),
+            location=location,
             identifier=self.identifier_from_token(children[1]),
             block=children[2],
         )
 
-    def c_block(self, meta, children):
+    def c_block(self, location, children):
         return ast.CBlock(
-            location=self.location_from_meta(meta),
+            location=location,
             quantifier=Quantifier.from_token(self.file, children[1]),
             statements=children[2:-1],
         )
 
-    def c_statement_block(self, meta, children):
+    def c_statement_block(self, location, children):
         return ast.CStatementBlock(
-            location=self.location_from_meta(meta),
+            location=location,
             block=children[0],
         )
 
-    def c_statement_attr(self, meta, children):
+    def c_statement_attr(self, location, children):
         return ast.CStatementAttr(
-            location=self.location_from_meta(meta),
+            location=location,
             identifier=self.identifier_from_token(children[0]),
             comparison=Comparison.from_token(self.file, children[1]),
             expression=children[2],
         )
 
-    def c_statement_call(self, meta, children):
+    def c_statement_call(self, location, children):
         return ast.CStatementCall(
-            location=self.location_from_meta(meta),
+            location=location,
             label=children[0],
             predicate=children[1],
             constraint=children[2],
         )
 
-    def c_statement_with(self, meta, children):
+    def c_statement_with(self, location, children):
         return ast.CStatementWith(
-            location=self.location_from_meta(meta),
+            location=location,
             label=children[0],
             predicate=children[1],
             kind=self.kind_from_token(children[2]),
             block=children[3],
         )
 
-    def p_definition(self, meta, children):
+    def p_definition(self, location, children):
         return ast.PDefinition(
-            location=self.location_from_meta(meta),
+            location=location,
             identifier=self.identifier_from_token(children[1]),
             parameters=self.parameter_from_children(children),
             block=children[-1],
         )
 
-    def p_block(self, meta, children):
+    def p_block(self, location, children):
         return ast.PBlock(
-            location=self.location_from_meta(meta),
+            location=location,
             quantifier=Quantifier.from_token(self.file, children[1]),
             statements=children[2:-1],
         )
 
-    def p_statement_block(self, meta, children):
+    def p_statement_block(self, location, children):
         return ast.PStatementBlock(
-            location=self.location_from_meta(meta),
+            location=location,
             block=children[0],
         )
 
-    def p_statement_size(self, meta, children):
+    def p_statement_size(self, location, children):
         return ast.PStatementSize(
-            location=self.location_from_meta(meta),
+            location=location,
             comparison=Comparison.from_token(self.file, children[1]),
             expression=children[2],
         )
 
-    def p_statement_aggr(self, meta, children):
+    def p_statement_aggr(self, location, children):
         return ast.PStatementAggr(
-            location=self.location_from_meta(meta),
+            location=location,
             aggregator=Aggregator.from_token(self.file, children[0]),
             kind=self.kind_from_token(children[2]),
             comparison=Comparison.from_token(self.file, children[4]),
             expression=children[5],
         )
 
-    def f_definition(self, meta, children):
+    def f_definition(self, location, children):
         return ast.FDefinition(
-            location=self.location_from_meta(meta),
+            location=location,
             identifier=self.identifier_from_token(children[1]),
             parameters=self.parameter_from_children(children),
             block=children[-1],
         )
 
-    def m_definition(self, meta, children):
+    def m_definition(self, location, children):
         return ast.MDefinition(
-            location=self.location_from_meta(meta),
+            location=location,
             identifier=self.identifier_from_token(children[1]),
             labels=[self.identifier_from_token(it) for it in children[3:-1]],
             block=children[-1],
         )
 
-    def f_block(self, meta, children):
+    def f_block(self, location, children):
         return ast.FBlock(
-            location=self.location_from_meta(meta),
+            location=location,
             statements=children[1:-1],
         )
 
-    def f_statement_block(self, meta, children):
+    def f_statement_block(self, location, children):
         return ast.FStatementBlock(
-            location=self.location_from_meta(meta),
+            location=location,
             block=children[0],
         )
 
-    def f_statement_define(self, meta, children):
+    def f_statement_define(self, location, children):
         return ast.FStatementDefine(
-            location=self.location_from_meta(meta),
+            location=location,
             qualifier=Qualifier.from_token(self.file, children[0]),
             identifier=self.identifier_from_token(children[1]),
             expression=children[3],
         )
 
-    def f_statement_assign(self, meta, children):
+    def f_statement_assign(self, location, children):
         return ast.FStatementAssign(
-            location=self.location_from_meta(meta),
+            location=location,
             identifier=self.identifier_from_token(children[0]),
             expression=children[2],
         )
 
-    def f_statement_return(self, meta, children):
+    def f_statement_return(self, location, children):
         return ast.FStatementReturn(
-            location=self.location_from_meta(meta),
+            location=location,
             expression=children[1],
         )
 
-    def f_statement_if(self, meta, children):
+    def f_statement_if(self, location, children):
         return ast.FStatementIf(
-            location=self.location_from_meta(meta),
+            location=location,
             condition=children[1],
             if_block=children[2],
             else_block=children[4],
         )
 
-    def f_statement_for(self, meta, children):
+    def f_statement_for(self, location, children):
         return ast.FStatementFor(
-            location=self.location_from_meta(meta),
+            location=location,
             identifier=self.identifier_from_token(children[1]),
             condition=children[3],
             block=children[4],
         )
 
-    def f_statement_fail(self, meta, children):
+    def f_statement_fail(self, location, children):
         return ast.FStatementFail(
-            location=self.location_from_meta(meta),
+            location=location,
             expression=children[1],
         )
 
-    def f_statement_expr(self, meta, children):
+    def f_statement_expr(self, location, children):
         return ast.FStatementExpr(
-            location=self.location_from_meta(meta),
+            location=location,
             expression=children[0],
         )
 
-    def expression_int(self, meta, children):
+    def expression_int(self, location, children):
         return ast.ExpressionLiteral(
-            location=self.location_from_meta(meta),
+            location=location,
             value=ComptimeValue.from_python(int(children[0])),
         )
 
-    def expression_float(self, meta, children):
+    def expression_float(self, location, children):
         return ast.ExpressionLiteral(
-            location=self.location_from_meta(meta),
+            location=location,
             value=ComptimeValue.from_python(float(children[0])),
         )
 
-    def expression_str(self, meta, children):
+    def expression_str(self, location, children):
         return ast.ExpressionLiteral(
-            location=self.location_from_meta(meta),
+            location=location,
             value=ComptimeValue.from_python(str(children[0])[1:-1]),
         )
 
-    def expression_true(self, meta, _):
+    def expression_true(self, location, _):
         return ast.ExpressionLiteral(
-            location=self.location_from_meta(meta),
+            location=location,
             value=ComptimeValue.from_python(True),
         )
 
-    def expression_false(self, meta, _):
+    def expression_false(self, location, _):
         return ast.ExpressionLiteral(
-            location=self.location_from_meta(meta),
+            location=location,
             value=ComptimeValue.from_python(False),
         )
 
-    def expression_none(self, meta, _):
+    def expression_none(self, location, _):
         return ast.ExpressionLiteral(
-            location=self.location_from_meta(meta),
+            location=location,
             value=ComptimeValue.from_python(None),
         )
 
-    def expression_kind(self, meta, children):
+    def expression_kind(self, location, children):
         return ast.ExpressionLiteral(
-            location=self.location_from_meta(meta),
+            location=location,
             value=ComptimeValue.from_python(NodeKind(children[0])),
         )
 
-    def expression_ref(self, meta, children):
+    def expression_ref(self, location, children):
         return ast.ExpressionRef(
-            location=self.location_from_meta(meta),
+            location=location,
             identifier=self.identifier_from_token(children[0]),
         )
 
-    def expression_attr(self, meta, children):
+    def expression_attr(self, location, children):
         return ast.ExpressionAttr(
-            location=self.location_from_meta(meta),
+            location=location,
             identifier=self.identifier_from_token(children[0]),
             attribute=self.identifier_from_token(children[2]),
         )
 
-    def expression_call(self, meta, children):
+    def expression_call(self, location, children):
         return ast.ExpressionCall(
-            location=self.location_from_meta(meta),
+            location=location,
             call=children[0],
         )
 
-    def expression_unary(self, meta, children):
+    def expression_unary(self, location, children):
         return ast.ExpressionUnary(
-            location=self.location_from_meta(meta),
+            location=location,
             operator=Operator.from_token(self.file, children[0]),
             expression=children[1],
         )
 
-    def expression_binary(self, meta, children):
+    def expression_binary(self, location, children):
         return ast.ExpressionBinary(
-            location=self.location_from_meta(meta),
+            location=location,
             operator=Operator.from_token(self.file, children[1]),
             left=children[0],
             right=children[2],
         )
 
-    def expression_group(self, meta, children):
+    def expression_group(self, location, children):
+        self._containers[children[1]] = location
         return children[1]
 
-    def expression_list(self, meta, children):
+    def expression_list(self, location, children):
         # TODO: some kind of synthetic location for lowering?
-        location = self.location_from_meta(meta)
 
         # lower list literal to multiple prepend expressions
 
@@ -319,33 +362,157 @@ class Transformer(lark.Transformer):
 
         return list
 
-    def call(self, meta, children):
+    def call(self, location, children):
         return ast.Call(
-            location=self.location_from_meta(meta),
+            location=location,
             identifier=self.identifier_from_token(children[0]),
             arguments=[it for it in children if isinstance(it, ast.Expression)],
         )
 
-    def label(self, meta, children):
+    def label(self, location, children):
         return ast.Label(
-            location=self.location_from_meta(meta),
+            location=location,
             identifier=self.identifier_from_token(children[0]),
         )
 
 
-_parser = lark.Lark.open(
-    'grammar.lark',
-    rel_to=__file__,
-    start='start',
-    parser='lalr',
-    propagate_positions=True,
-    keep_all_tokens=True,
-)
+_grammar = pathlib.Path(__file__).parent.joinpath('grammar.lark')
+
 
+def _cache_key() -> str:
+    """
+    Key for the serialized parser tables. Lark pickles the tables, therefore the python version is part of the key.
+    """
+    digest = hashlib.sha256(_grammar.read_bytes())
+    digest.update(lark.__version__.encode())
+    digest.update(('%d.%d' % sys.version_info[:2]).encode())
+
+    return digest.hexdigest()[:16]
+
+
+def _cache_dir() -> Optional[pathlib.Path]:
+    """
+    Directory for the per-user cache, can be changed with COLC_CACHE_DIR. Setting it to an empty value disables it.
+    """
+    path = os.environ.get('COLC_CACHE_DIR')
+    if path is not None:
+        return pathlib.Path(path) if path else None
+
+    path = os.environ.get('XDG_CACHE_HOME')
+    if path:
+        return pathlib.Path(path).joinpath('colc')
+
+    return pathlib.Path.home().joinpath('.cache', 'colc')
+
+
+def _cache_file() -> Optional[pathlib.Path]:
+    name = f'grammar-{_cache_key()}.cache'
+
+    # prebuilt cache shipped with the package
+    path = _grammar.parent.joinpath(name)
+    if path.exists():
+        return path
+
+    directory = _cache_dir()
+    if directory is None:
+        return None
 
-def parse(file: TextFile) -> list[ast.Node]:
     try:
-        return Transformer(file).transform(_parser.parse(file.text))
+        directory.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+
+    return directory.joinpath(name)
+
+
+def _create_parser(cache: Optional[pathlib.Path], transformer: Optional[object] = None) -> lark.Lark:
+    # the transformer is not part of the cached tables, both parsers share the same cache
+    return lark.Lark.open(
+        str(_grammar),
+        start='start',
+        parser='lalr',
+        propagate_positions=True,
+        keep_all_tokens=True,
+        cache=str(cache) if cache is not None else False,
+        transformer=transformer,
+    )
+
+
+class Transformer(lark.Transformer):
+    """
+    Builds the ast from a lark parse tree.
+    """
+
+    def __init__(self, file: TextFile):
+        super().__init__()
+        self.builder = AstBuilder(file)
+
+    def __default__(self, data, children, meta):
+        return getattr(self.builder, data)(self.builder.location_from_meta(meta), children)
+
+
+class _Callbacks:
+    """
+    Builds the ast directly from the parser callbacks, without an intermediate parse tree. Lark binds the callbacks
+    once per parser, therefore the builder for the current file is looked up from a context variable.
+    """
+
+    def __getattr__(self, rule: str):
+        if rule.startswith('__'):
+            raise AttributeError(rule)
+
+        method = getattr(AstBuilder, rule)
+
+        def callback(children: list):
+            builder = _builder.get()
+            return method(builder, builder.location_from_children(children), children)
+
+        return callback
+
+
+_builder: contextvars.ContextVar[AstBuilder] = contextvars.ContextVar('builder')
+
+
+@functools.cache
+def _get_parser(single_pass: bool) -> lark.Lark:
+    return _create_parser(_cache_file(), _Callbacks() if single_pass else None)
+
+
+def prebuild_parser() -> pathlib.Path:
+    """
+    Writes the parser tables next to the grammar, such that they can be shipped with the package.
+    """
+    path = _grammar.parent.joinpath(f'grammar-{_cache_key()}.cache')
+    path.unlink(missing_ok=True)
+
+    _create_parser(path)
+    return path
+
+
+def _parse_single_pass(file: TextFile) -> list[ast.Node]:
+    token = _builder.set(AstBuilder(file))
+
+    try:
+        # the callbacks return the ast nodes instead of a tree
+        return cast(list[ast.Node], _get_parser(single_pass=True).parse(file.text))
+    finally:
+        _builder.reset(token)
+
+
+def _parse_two_pass(file: TextFile) -> list[ast.Node]:
+    return Transformer(file).transform(_get_parser(single_pass=False).parse(file.text))
+
+
+def parse(file: TextFile, single_pass: bool = True) -> list[ast.Node]:
+    """
+    Parses the file into a list of top level nodes. In single pass mode the ast is build by the parser callbacks,
+    otherwise a lark parse tree is created first and transformed afterward.
+    """
+    try:
+        if single_pass:
+            return _parse_single_pass(file)
+        else:
+            return _parse_two_pass(file)
     except lark.UnexpectedToken as e:
         if e.token.type == '$END':
             fatal_problem('unexpected end of input')
@@ -0,0 +1,4 @@
+from colc.frontend import ast
+
+# validate the fields of all ast nodes during tests
+ast.enable_type_checks()
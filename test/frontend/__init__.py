@@ -0,0 +1,36 @@
+import pathlib
+import unittest
+
+from colc import TextFile, FatalProblem
+from colc.frontend import parse
+from test.utils import read_file_test
+
+_root = pathlib.Path(__file__).parent.parent
+
+
+def _inputs():
+    for file in _root.glob('**/*.test'):
+        yield file, read_file_test(file)['input']
+
+    for file in _root.glob('**/*.col'):
+        yield file, file.read_text()
+
+    for file in _root.parent.joinpath('colc', 'includes').glob('*.coli'):
+        yield file, file.read_text()
+
+    # groups do not cover the parentheses, but the parent expression does
+    yield pathlib.Path('group'), 'map main { final a = (1 + (root.x)) * -(3); f((a)); }'
+
+
+def _parse(text: str, single_pass: bool) -> str:
+    try:
+        return repr(parse(TextFile(pathlib.Path('test.col'), text), single_pass=single_pass))
+    except FatalProblem as e:
+        return e.render()
+
+
+class ParserTest(unittest.TestCase):
+    def test_single_pass(self):
+        for file, text in _inputs():
+            with self.subTest(file.name):
+                self.assertEqual(_parse(text, single_pass=False), _parse(text, single_pass=True))
@@ -0,0 +1,70 @@
+import os
+import pathlib
+import tempfile
+import unittest
+
+from colc import TextFile, FatalProblem, parse_file
+
+
+class IncludeTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self._dir.name)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def write(self, name: str, includes: list[str], text: str = ''):
+        lines = ['/include/ "%s";' % self.dir.joinpath(it) for it in includes]
+        self.dir.joinpath(f'{name}.coli').write_text('\n'.join(lines + [text]))
+
+    def parse(self, *includes: str):
+        lines = ['/include/ "%s";' % self.dir.joinpath(it) for it in includes]
+        return parse_file(TextFile(self.dir.joinpath('test.col'), '\n'.join(lines)))
+
+    def test_diamond(self):
+        self.write('a', ['b', 'c'])
+        self.write('b', ['d'])
+        self.write('c', ['d'])
+        self.write('d', [], 'fun d() {}')
+
+        a = self.parse('a').includes[0]
+        b, c = a.includes
+
+        self.assertIs(b.includes[0], c.includes[0])
+
+    def test_cycle(self):
+        self.write('a', ['b'])
+        self.write('b', ['a'])
+
+        with self.assertRaises(FatalProblem) as e:
+            self.parse('a')
+
+        self.assertIn('fatal problem: cyclic include', e.exception.render())
+
+    def test_self_include(self):
+        self.write('a', ['a'])
+
+        with self.assertRaises(FatalProblem):
+            self.parse('a')
+
+    def test_cache(self):
+        self.write('a', [], 'fun a() {}')
+
+        first = self.parse('a').includes[0]
+        second = self.parse('a').includes[0]
+
+        # parsed once, but linked for every compilation
+        self.assertIsNot(first, second)
+        self.assertIs(first.definitions[0], second.definitions[0])
+
+    def test_cache_modified(self):
+        self.write('a', [], 'fun a() {}')
+        first = self.parse('a').includes[0]
+
+        self.write('a', [], 'fun b() {}')
+        os.utime(self.dir.joinpath('a.coli'), ns=(0, 0))
+        second = self.parse('a').includes[0]
+
+        self.assertEqual('b', second.definitions[0].identifier.name)
+        self.assertIsNot(first.definitions[0], second.definitions[0])
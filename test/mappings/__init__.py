@@ -0,0 +1,32 @@
+import unittest
+
+from colc import debug
+from colc.backend import Opcode
+from test.utils import compile_mappings
+
+
+def _compile_lines(lines: list[str]) -> list[str]:
+    _, mappings = compile_mappings('\n'.join(lines))
+    return debug.format_code(mappings[0].code).splitlines()
+
+
+class ExtendedArgumentTest(unittest.TestCase):
+    def test_wide_const(self):
+        code = _compile_lines(['map main {'] + [f'  final a{i} = "s{i}";' for i in range(300)] + ['}'])
+
+        self.assertEqual('510: CONST      255', code[510])
+        self.assertEqual('511: STORE      256', code[511])
+        self.assertEqual('513: CONST      256', code[512])
+
+    def test_wide_jump(self):
+        body = [f'    s = s .. "k{i}";' for i in range(140)]
+        code = _compile_lines(['map main {', '  var s = "";', '  for item in children(root) {'] + body + ['  }', '}'])
+
+        # both jumps need a prefix, distances are relative to the jump after its prefix
+        self.assertEqual('006: HAS_NEXT     2', code[6])
+        self.assertEqual('007: JMP_FF     287', code[7])
+        self.assertEqual('293: JMP_B      288', code[-1])
+
+    def test_no_prefix(self):
+        _, mappings = compile_mappings('map main { final a = 1; }')
+        self.assertNotIn(Opcode.EXT, mappings[0].code[::2])
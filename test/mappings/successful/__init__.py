@@ -3,11 +3,16 @@ import unittest
 from colc.common import first
 
 from colc import Config, debug, FatalProblem
+from colc.backend import Subroutine
 from test.utils import FileTestMeta, compile_mappings
 
 
+def _format_subroutines(subroutines: list[Subroutine]) -> str:
+    return '\n\n'.join('%03d: %s\n%s' % (i, it.name, debug.format_code(it.code)) for i, it in enumerate(subroutines))
+
+
 class FileTest(unittest.TestCase, metaclass=FileTestMeta, path=__file__):
-    def do_test(self, input, output, const_pool=None, optimizations=''):
+    def do_test(self, input, output, const_pool=None, subroutines=None, optimizations=''):
         config = Config(optimizations=optimizations.split('\n'))
 
         try:
@@ -20,6 +25,11 @@ class FileTest(unittest.TestCase, metaclass=FileTestMeta, path=__file__):
         mapping = first(mappings)
         self.assertEqual(output, debug.format_code(mapping.code))
 
+        if subroutines:
+            self.assertEqual(subroutines, _format_subroutines(ctx.get_subroutines()))
+        else:
+            self.assertEqual(len(ctx.get_subroutines()), 0)
+
         if const_pool:
             self.assertEqual(const_pool, debug.format_pool(ctx.get_const_pool()))
         else:
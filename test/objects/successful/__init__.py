@@ -1,7 +1,8 @@
 import pathlib
+import pickle
 import unittest
 
-from colc import Object, FatalProblem
+from colc import Object, Opcode, FatalProblem, debug
 from test.utils import compile_object
 
 
@@ -28,3 +29,35 @@ class ObjectTest(unittest.TestCase):
 
     def test_all(self):
         self.compile('all')
+
+    def test_slots(self):
+        obj = self.compile('slots')
+
+        # slots of inlined functions and loops are reused once their scope ends
+        self.assertEqual(10, obj.mappings[0].slots)
+
+    def test_large_list(self):
+        consts = ', '.join(str(it) for it in range(450))
+        nodes = ', '.join(['root'] * 450)
+
+        try:
+            (_, obj) = compile_object(
+                f'con main {{ all: size >= 1; }} map main {{ final a = [{consts}]; final b = [{nodes}]; }}'
+            )
+        except FatalProblem as e:
+            self.fail(e.render())
+
+        # list literals are lowered to nested prepend expressions, their length is not limited by the recursion depth
+        self.assertIn(tuple(range(450)), obj.const_pool)
+
+        opcodes = [opcode for _, opcode, _ in debug.decode_code(obj.mappings[0].code)]
+        self.assertEqual(450, opcodes.count(Opcode.PREPEND))
+
+    def test_comptime_calls(self):
+        obj = self.compile('comptime')
+
+        self.assertEqual(2, obj.statistics['comptime call hit'])
+        self.assertEqual(3, obj.statistics['comptime call miss'])
+
+        # statistics are not part of the encoded object
+        self.assertFalse(hasattr(pickle.loads(pickle.dumps(obj)), 'statistics'))
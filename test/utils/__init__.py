@@ -1,4 +1,5 @@
 from ._file_test import FileTestMeta as FileTestMeta
+from ._file_test import read_file_test as read_file_test
 
 from ._compile import create_test_context as create_test_context
 from ._compile import compile_constraint as compile_constraint
@@ -1,7 +1,7 @@
 from pathlib import Path
 
 
-def _do_file_test(self, file: Path):
+def read_file_test(file: Path) -> dict[str, str]:
     with file.open() as f:
         lines = f.readlines()
 
@@ -25,7 +25,11 @@ def _do_file_test(self, file: Path):
         while len(value) > 0 and value[-1] == '':
             value.pop()
 
-    self.do_test(**{name: '\n'.join(value) for name, value in inputs.items()})
+    return {name: '\n'.join(value) for name, value in inputs.items()}
+
+
+def _do_file_test(self, file: Path):
+    self.do_test(**read_file_test(file))
 
 
 class FileTestMeta(type):